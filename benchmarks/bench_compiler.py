@@ -0,0 +1,210 @@
+"""
+Compiler scaling benchmark.
+
+Usage:
+    python benchmarks/bench_compiler.py [--components 10,100,500] [--functions 3]
+        [--workflows 1] [--depth 2] [--repeat 3] [--output results.json]
+        [--baseline baseline.json] [--tolerance 0.5]
+
+For each synthetic spec size, every available compile path is measured in a
+fresh subprocess, so import costs and memory do not leak between paths:
+
+    lark        dynamic Lark LALR parser built from AISPEC_GRAMMAR
+    standalone  pre-generated kernel/_aispec_parser.py (if up to date)
+    cached      Compiler.compile_file served from a warm SpecCache
+
+Results are written as JSON. Every timed run is preceded by a short, fixed
+pure-Python reference workload, and each total is also stored as the median
+ratio of run to reference ("total_rel"). That cancels most of the difference in
+speed between machines, and between slow and fast moments on a shared one.
+
+With --baseline, any (case, path) whose relative total exceeds the baseline's by
+more than the tolerance is reported as a regression and the exit status is 1.
+Peak memory is compared too when both runs used the same Python version. The
+default tolerance of 50% absorbs the noise that remains between machines (CPU
+caches, turbo, Python builds); use a tighter one when comparing runs on one
+machine. benchmarks/baseline.json holds results for the default cases.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import statistics
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.specgen import generate_spec
+
+PATHS = ("lark", "standalone", "cached")
+
+# Cache hits take milliseconds, where a single disk or GC hiccup is a large relative
+# error, so that path takes the best of this many times more runs
+CACHED_REPEAT_FACTOR = 10
+
+def reference_workload() -> float:
+    """Time of one run of a fixed pure-Python workload (dicts, strings, sorting), the unit of total_rel."""
+    t0 = time.perf_counter()
+    table = {}
+    for i in range(50_000):
+        table[f"k{i % 5000}"] = table.get(f"k{i % 5000}", 0) + i
+    sorted(table.items(), key=lambda kv: (kv[1], kv[0]))
+    return time.perf_counter() - t0
+
+def _measure_worker(path_kind: str, spec_file: str, repeat: int) -> dict:
+    """Runs inside the subprocess. Prints one JSON object."""
+    start = time.perf_counter()
+    from kernel import compiler as compiler_mod
+    from kernel.cache import SpecCache
+    if path_kind == "standalone":
+        from kernel import spec_parser
+        if spec_parser._standalone is None:
+            return {"skipped": "standalone parser missing or stale (run python -m kernel.build_parser)"}
+
+    with open(spec_file, "r", encoding="utf-8") as f:
+        source = f.read()
+
+    if path_kind == "cached":
+        with tempfile.TemporaryDirectory(prefix="spak_bench_cache_") as cache_dir:
+            compiler = compiler_mod.Compiler(cache=SpecCache(cache_dir))
+            startup = time.perf_counter() - start
+            compiler.compile_file(spec_file) # Warm the cache
+            compiler = compiler_mod.Compiler(cache=SpecCache(cache_dir))
+            best = float("inf")
+            ratios = []
+            for _ in range(repeat * CACHED_REPEAT_FACTOR):
+                reference = reference_workload()
+                t0 = time.perf_counter()
+                compiler.compile_file(spec_file)
+                elapsed = time.perf_counter() - t0
+                best = min(best, elapsed)
+                ratios.append(elapsed / reference)
+            gc.collect()
+            tracemalloc.start()
+            compiler.compile_file(spec_file)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return {"startup_s": startup, "parse_s": None, "transform_s": None, "total_s": best, "peak_bytes": peak,
+                    "total_rel": statistics.median(ratios)}
+
+    compiler = compiler_mod.Compiler()
+    parser = compiler.parser
+    startup = time.perf_counter() - start
+
+    best_parse = best_transform = float("inf")
+    ratios = []
+    for _ in range(repeat):
+        reference = reference_workload()
+        t0 = time.perf_counter()
+        tree = parser.parse(source)
+        t1 = time.perf_counter()
+        compiler.transformer.transform(tree)
+        t2 = time.perf_counter()
+        best_parse = min(best_parse, t1 - t0)
+        best_transform = min(best_transform, t2 - t1)
+        ratios.append((t2 - t0) / reference)
+
+    # Separate run: tracing slows execution and must not distort the timings
+    gc.collect()
+    tracemalloc.start()
+    compiler.transformer.transform(parser.parse(source))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"startup_s": startup, "parse_s": best_parse, "transform_s": best_transform,
+            "total_s": best_parse + best_transform, "peak_bytes": peak, "total_rel": statistics.median(ratios)}
+
+def _run_path(path_kind: str, spec_file: str, repeat: int) -> dict:
+    env = dict(os.environ)
+    env.pop("SPAK_DYNAMIC_PARSER", None)
+    if path_kind == "lark":
+        env["SPAK_DYNAMIC_PARSER"] = "1"
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", path_kind, spec_file, str(repeat)],
+        capture_output=True, text=True, env=env, cwd=ROOT,
+    )
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "worker failed"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def compare(results: list, baseline: dict, tolerance: float, python: str) -> list:
+    """Returns human-readable regressions of results against a baseline results file."""
+    previous = {(r["case"], r["path"]): r for r in baseline.get("results", [])}
+    metrics = ["total_rel"]
+    if baseline.get("meta", {}).get("python") == python:
+        metrics.append("peak_bytes") # Allocation sizes differ between Python versions
+    regressions = []
+    for r in results:
+        old = previous.get((r["case"], r["path"]))
+        if not old:
+            continue
+        for metric in metrics:
+            if metric in r and old.get(metric) and r[metric] > old[metric] * (1 + tolerance):
+                regressions.append(f"{r['case']} [{r['path']}] {metric}: {old[metric]:.4g} -> {r[metric]:.4g} "
+                                   f"(+{(r[metric] / old[metric] - 1) * 100:.0f}%)")
+    return regressions
+
+def main():
+    ap = argparse.ArgumentParser(description="AgentSpec compiler benchmark")
+    ap.add_argument("--components", default="10,100,500", help="Comma-separated component counts")
+    ap.add_argument("--functions", type=int, default=3)
+    ap.add_argument("--workflows", type=int, default=1)
+    ap.add_argument("--depth", type=int, default=2, help="Generic type nesting depth")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--output", default=None, help="Write JSON results here")
+    ap.add_argument("--baseline", default=None, help="JSON results file to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative slowdown")
+    ns = ap.parse_args()
+
+    from kernel.compiler import GRAMMAR_VERSION
+    results = []
+    with tempfile.TemporaryDirectory(prefix="spak_bench_") as tmp:
+        for n in [int(x) for x in ns.components.split(",")]:
+            case = f"c{n}_f{ns.functions}_w{ns.workflows}_d{ns.depth}"
+            spec_file = os.path.join(tmp, f"SPEC.{case}.md")
+            with open(spec_file, "w", encoding="utf-8") as f:
+                f.write(generate_spec(f"Bench{n}", components=n, functions=ns.functions,
+                                      workflows=ns.workflows, depth=ns.depth))
+            for path_kind in PATHS:
+                row = {"case": case, "path": path_kind, "spec_bytes": os.path.getsize(spec_file)}
+                row.update(_run_path(path_kind, spec_file, ns.repeat))
+                results.append(row)
+                if "total_s" in row:
+                    parse = f"{row['parse_s'] * 1000:8.1f}" if row["parse_s"] is not None else "       -"
+                    transform = f"{row['transform_s'] * 1000:8.1f}" if row["transform_s"] is not None else "       -"
+                    print(f"{case:<22} {path_kind:<10} parse {parse} ms  transform {transform} ms  "
+                          f"total {row['total_s'] * 1000:8.1f} ms  peak {row['peak_bytes'] / 1024:8.0f} KiB  "
+                          f"startup {row['startup_s'] * 1000:6.1f} ms")
+                else:
+                    print(f"{case:<22} {path_kind:<10} {row.get('skipped') or row.get('error')}")
+
+    report = {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(),
+                 "grammar_version": GRAMMAR_VERSION, "repeat": ns.repeat},
+        "results": results,
+    }
+    if ns.output:
+        with open(ns.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {ns.output}")
+
+    if ns.baseline:
+        with open(ns.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), ns.tolerance, platform.python_version())
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) against {ns.baseline}:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"✅ No regressions against {ns.baseline} (tolerance {ns.tolerance:.0%})")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        print(json.dumps(_measure_worker(sys.argv[2], sys.argv[3], int(sys.argv[4]))))
+    else:
+        main()
@@ -0,0 +1,34 @@
+"""
+Generates kernel/_aispec_parser.py, a standalone LALR parser for AISPEC_GRAMMAR.
+
+Usage: python -m kernel.build_parser
+
+Re-run after editing the grammar. Until then the Compiler detects the stale
+module through GRAMMAR_VERSION and falls back to building the parser with Lark.
+"""
+import io
+import os
+import sys
+from lark import Lark
+from lark.tools.standalone import gen_standalone
+from .compiler import AISPEC_GRAMMAR, GRAMMAR_VERSION
+
+OUTPUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_aispec_parser.py")
+
+def build(output_path: str = OUTPUT_PATH) -> str:
+    # Must match the options used by spec_parser.make_parser
+    lark_inst = Lark(AISPEC_GRAMMAR, start='start', parser='lalr')
+    buf = io.StringIO()
+    gen_standalone(lark_inst, out=buf)
+
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("# Generated by 'python -m kernel.build_parser'. Do not edit.\n")
+        f.write(buf.getvalue())
+        f.write(f"\nGRAMMAR_VERSION = {GRAMMAR_VERSION!r}\n")
+    os.replace(tmp_path, output_path)
+    return output_path
+
+if __name__ == "__main__":
+    path = build(sys.argv[1] if len(sys.argv) > 1 else OUTPUT_PATH)
+    print(f"✅ Wrote standalone parser to {path} (grammar {GRAMMAR_VERSION})")
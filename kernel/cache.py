@@ -0,0 +1,185 @@
+import os
+import json
+import pickle
+import hashlib
+from typing import Any, Optional
+
+DEFAULT_CACHE_ROOT = ".spak_cache"
+
+class DiskCache:
+    """
+    A flat directory of content-addressed entries with a total size cap.
+    Recency is tracked through file mtimes (touched on every hit), so the
+    least-recently-used entries are evicted first once the cap is exceeded.
+    """
+    def __init__(self, cache_dir: str, max_bytes: int = 64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path, None) # Mark as recently used
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def put_bytes(self, key: str, data: bytes):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path) # Atomic, safe with concurrent writers
+        self.evict()
+
+    def evict(self):
+        """Removes least-recently-used entries until the cache fits in max_bytes."""
+        try:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.cache_dir):
+                if not entry.is_file() or entry.name.endswith(".tmp"):
+                    continue
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        except OSError:
+            return
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file():
+                os.remove(entry.path)
+
+    def stats(self) -> dict:
+        entries = size = 0
+        if os.path.isdir(self.cache_dir):
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    entries += 1
+                    size += entry.stat().st_size
+        return {"hits": self.hits, "misses": self.misses, "entries": entries,
+                "bytes": size, "max_bytes": self.max_bytes}
+
+class SpecCache(DiskCache):
+    """
+    Caches compiled SystemSpec ASTs keyed by source content hash plus grammar version.
+    """
+    # Bump when the shape of the AST node classes changes.
+    FORMAT_VERSION = 5
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 64 * 1024 * 1024):
+        super().__init__(cache_dir or os.path.join(DEFAULT_CACHE_ROOT, "specs"), max_bytes)
+
+    def key_for(self, source: bytes, grammar_version: str) -> str:
+        h = hashlib.sha256()
+        h.update(f"{grammar_version}:{self.FORMAT_VERSION}:".encode("utf-8"))
+        h.update(source)
+        return h.hexdigest() + ".pkl"
+
+    def get(self, key: str) -> Optional[Any]:
+        data = self.get_bytes(key)
+        if data is None:
+            return None
+        try:
+            return pickle.loads(data)
+        except Exception:
+            # Corrupt or stale entry: treat as a miss and drop it
+            self.hits -= 1
+            self.misses += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            return None
+
+    def put(self, key: str, spec: Any):
+        self.put_bytes(key, pickle.dumps(spec, protocol=pickle.HIGHEST_PROTOCOL))
+
+class LLMCache(DiskCache):
+    """
+    Caches LLM responses keyed by model, temperature, system prompt and user prompt.
+    """
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 128 * 1024 * 1024):
+        super().__init__(cache_dir or os.path.join(DEFAULT_CACHE_ROOT, "llm"), max_bytes)
+
+    def key_for(self, model: str, temperature: Optional[float], system_prompt: str, prompt: str,
+                response_format: Optional[dict] = None, sample: int = 0) -> str:
+        """`sample` tells apart repeated draws of the same request (e.g. speculative candidates)."""
+        fields = [model, temperature, system_prompt, prompt]
+        if response_format is not None:
+            fields.append(response_format) # Appended only when set, so existing keys stay valid
+        if sample:
+            fields.append({"sample": sample})
+        payload = json.dumps(fields, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest() + ".json"
+
+    def get(self, key: str) -> Optional[str]:
+        data = self.get_bytes(key)
+        if data is None:
+            return None
+        try:
+            return json.loads(data.decode("utf-8"))["response"]
+        except (ValueError, KeyError):
+            self.hits -= 1
+            self.misses += 1
+            return None
+
+    def put(self, key: str, response: str):
+        self.put_bytes(key, json.dumps({"response": response}, ensure_ascii=False).encode("utf-8"))
+
+class ResultCache(DiskCache):
+    """
+    Caches passing verification results, keyed by a fingerprint of everything the
+    outcome depends on (see DynamicVerifier): the test entry, the component source
+    and its imports, and the handler configuration.
+    """
+    # Bump when the way tests are executed or judged changes.
+    FORMAT_VERSION = 1
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 16 * 1024 * 1024):
+        super().__init__(cache_dir or os.path.join(DEFAULT_CACHE_ROOT, "verify"), max_bytes)
+
+    def key_for(self, *parts: Any) -> str:
+        payload = json.dumps([self.FORMAT_VERSION, *parts], ensure_ascii=False, sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest() + ".json"
+
+    def get(self, key: str) -> Optional[dict]:
+        data = self.get_bytes(key)
+        if data is None:
+            return None
+        try:
+            return json.loads(data.decode("utf-8"))
+        except ValueError:
+            self.hits -= 1
+            self.misses += 1
+            return None
+
+    def put(self, key: str, result: dict):
+        self.put_bytes(key, json.dumps(result, ensure_ascii=False).encode("utf-8"))
@@ -0,0 +1,179 @@
+import re
+import ast
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+from .compiler import ComponentSpec, TypeRef, type_ref
+from .effect_bindings import render_effect, imported_names
+from .workflow_ir import PerformOp, AssignOp, ReturnOp, OpaqueOp, parse_body
+
+# AgentSpec primitive types -> Python annotations
+PRIMITIVE_TYPES = {
+    "String": "str", "Int": "int", "Integer": "int", "Float": "float", "Number": "float",
+    "Bool": "bool", "Boolean": "bool", "Unit": "None", "Dict": "dict", "Any": "Any",
+}
+
+@dataclass
+class GeneratedComponent:
+    """Deterministically generated parts of a component."""
+    name: str
+    description: str = ""
+    methods: Dict[str, str] = field(default_factory=dict) # method name -> source (indented)
+    missing: List[str] = field(default_factory=list)      # signatures the LLM still has to implement
+    functions_generated: int = 0
+    effect_names: Set[str] = field(default_factory=set)
+    typing_names: Set[str] = field(default_factory=set)
+
+    @property
+    def complete(self) -> bool:
+        # Workflow methods alone do not make a usable component
+        return self.functions_generated > 0 and not self.missing
+
+    def header(self) -> str:
+        lines = []
+        if self.typing_names:
+            lines.append(f"from typing import {', '.join(sorted(self.typing_names))}")
+        if self.effect_names:
+            lines.append("from kernel.semantic_kernel import perform")
+            lines.append(f"from kernel.effects import {', '.join(sorted(self.effect_names))}")
+        return "\n".join(lines)
+
+    def source(self) -> str:
+        """Full module source. Only meaningful when complete."""
+        parts = []
+        header = self.header()
+        if header:
+            parts.append(header + "\n\n")
+        parts.append(f"class {self.name}:\n")
+        if self.description:
+            parts.append(f'    """{self.description}"""\n\n')
+        parts.append("\n".join(self.methods.values()) if self.methods else "    pass\n")
+        return "".join(parts)
+
+def type_hint(ref: TypeRef, typing_names: Set[str]) -> str:
+    if ref.name == "List" and ref.args:
+        typing_names.add("List")
+        return f"List[{type_hint(ref.args[0], typing_names)}]"
+    if ref.name == "Map" and len(ref.args) == 2:
+        typing_names.add("Dict")
+        return f"Dict[{type_hint(ref.args[0], typing_names)}, {type_hint(ref.args[1], typing_names)}]"
+    if ref.name == "Result" and ref.args:
+        # Errors surface as exceptions, so a Result<T, E> returns T
+        return type_hint(ref.args[0], typing_names)
+    hint = PRIMITIVE_TYPES.get(ref.name)
+    if hint is None:
+        hint = "Any" # Spec-level types (e.g. SystemSpec) have no Python counterpart here
+    if hint == "Any":
+        typing_names.add("Any")
+    return hint
+
+def _snake_case(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+def _lower_ops(ops, returns_value: bool, gen: GeneratedComponent) -> List[str]:
+    lines = []
+    for i, op in enumerate(ops):
+        last = i == len(ops) - 1
+        if isinstance(op, PerformOp):
+            expr = render_effect(op.effect, op.operation, op.args)
+            gen.effect_names.update(imported_names(expr))
+            call = f"perform({expr})"
+            if op.returns or (last and returns_value and not op.target):
+                lines.append(f"return {call}") # A trailing perform is the function's result
+            elif op.target:
+                lines.append(f"{op.target} = {call}")
+                if last and returns_value:
+                    lines.append(f"return {op.target}")
+            else:
+                lines.append(call)
+        elif isinstance(op, AssignOp):
+            lines.append(f"{op.target} = {op.expr}")
+            if last and returns_value:
+                lines.append(f"return {op.target}")
+        elif isinstance(op, ReturnOp):
+            lines.append(f"return {op.expr}")
+    return lines
+
+def _signature(name: str, params, return_type: TypeRef, gen: GeneratedComponent) -> str:
+    args = ["self"] + [f"{p.name}: {type_hint(p.type, gen.typing_names)}" for p in params]
+    return f"def {name}({', '.join(args)}) -> {type_hint(return_type, gen.typing_names)}:"
+
+def _unused_params(params, method: ast.FunctionDef) -> List[str]:
+    used = {n.id for n in ast.walk(method) if isinstance(n, ast.Name)}
+    return [p.name for p in params if p.name not in used]
+
+def _generate_method(name: str, params, return_type: TypeRef, ops, gen: GeneratedComponent,
+                     require_params: bool = False) -> bool:
+    if not ops or any(isinstance(op, OpaqueOp) for op in ops):
+        return False
+    effect_names, typing_names = set(gen.effect_names), set(gen.typing_names)
+    lines = _lower_ops(ops, return_type.name != "Unit", gen)
+    source = "    " + _signature(name, params, return_type, gen) + "\n"
+    source += "".join(f"        {line}\n" for line in lines)
+    method = ast.parse(source.strip()).body[0] # Generated code must always be valid Python
+    if require_params and _unused_params(params, method):
+        # A body that ignores declared parameters is an illustration with literal
+        # stand-ins (e.g. `perform Math.add(a, b)` for calculate(a, b, op)), not the implementation
+        gen.effect_names, gen.typing_names = effect_names, typing_names
+        return False
+    gen.methods[name] = source
+    return True
+
+def generate_component(spec: ComponentSpec) -> GeneratedComponent:
+    """
+    Emits typed methods for every function whose body is in the workflow IR subset
+    and uses all of its parameters, plus a method per compilable workflow.
+    Everything else is listed in `missing`.
+    """
+    gen = GeneratedComponent(name=spec.name, description=spec.description)
+    for func in spec.functions:
+        if func.body and _generate_method(func.name, func.params, func.return_type, parse_body(func.body), gen,
+                                          require_params=True):
+            gen.functions_generated += 1
+            continue
+        params = ", ".join(f"{p.name}: {p.type.name}" for p in func.params)
+        gen.missing.append(f"{func.name}({params}) -> {func.return_type.name}")
+
+    for workflow in spec.workflows:
+        if not workflow.compilable:
+            continue
+        ops = [op for step in workflow.ir for op in step.ops]
+        _generate_method(_snake_case(workflow.name), workflow.params, type_ref("Any"), ops, gen)
+    return gen
+
+def merge_into(llm_code: str, gen: GeneratedComponent) -> str:
+    """
+    Splices the generated methods into LLM-written code for the same class,
+    replacing any LLM version of them, and adds the generated imports.
+    Returns llm_code unchanged if it cannot be parsed.
+    """
+    if not gen.methods:
+        return llm_code
+    try:
+        tree = ast.parse(llm_code)
+    except SyntaxError:
+        return llm_code
+    class_node = next((n for n in tree.body if isinstance(n, ast.ClassDef) and n.name == gen.name), None)
+    if class_node is None:
+        return llm_code
+
+    lines = llm_code.splitlines()
+    existing = {n.name: n for n in class_node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))}
+    # Replace bottom-up so earlier line numbers stay valid
+    replacements = []
+    for name, source in gen.methods.items():
+        node = existing.get(name)
+        if node is not None:
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list]) - 1
+            replacements.append((start, node.end_lineno, source.rstrip("\n").splitlines()))
+    for start, end, new_lines in sorted(replacements, reverse=True):
+        lines[start:end] = new_lines
+
+    appended = [source.rstrip("\n") for name, source in gen.methods.items() if name not in existing]
+    if appended:
+        insert_at = class_node.end_lineno + sum(len(r[2]) - (r[1] - r[0]) for r in replacements)
+        lines[insert_at:insert_at] = sum(([""] + s.splitlines() for s in appended), [])
+
+    header = [line for line in gen.header().splitlines() if line not in lines]
+    if header and lines and lines[0].startswith("class "):
+        header.append("")
+    return "\n".join(header + lines) + "\n"
@@ -1,6 +1,11 @@
-from lark import Lark, Transformer, v_args, Token
+import sys
+import hashlib
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Any
+from typing import TYPE_CHECKING, List, Dict, Optional, Any, Tuple
+from .cache import SpecCache
+from .spec_index import SpecIndex
+if TYPE_CHECKING:
+    from .workflow_ir import StepIR
 
 # --- Grammar Definition ---
 AISPEC_GRAMMAR = r"""
@@ -64,42 +69,110 @@ STRING: /"[^"]*"/
 %ignore SH_COMMENT
 """
 
+# Identifies the grammar a cached AST was produced with.
+GRAMMAR_VERSION = hashlib.sha256(AISPEC_GRAMMAR.encode("utf-8")).hexdigest()[:16]
+
 # --- AST Nodes ---
+# Nodes are slotted to drop the per-instance __dict__. Type references and
+# fields are immutable and interned, and parameter lists are shared tuples,
+# so identical signatures across thousands of systems share one object.
+
+_interned_types: Dict[tuple, 'TypeRef'] = {}
+_interned_fields: Dict[tuple, 'Field'] = {}
+_interned_params: Dict[tuple, tuple] = {}
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TypeRef:
     name: str
-    args: List['TypeRef'] = field(default_factory=list)
+    args: Tuple['TypeRef', ...] = ()
 
-@dataclass
+    def __reduce__(self):
+        return (type_ref, (self.name, self.args))
+
+@dataclass(frozen=True, slots=True)
 class Field:
     name: str
     type: TypeRef
 
-@dataclass
+    def __reduce__(self):
+        return (field_ref, (self.name, self.type))
+
+def type_ref(name: str, args: Tuple[TypeRef, ...] = ()) -> TypeRef:
+    """Returns the canonical TypeRef for name[args]."""
+    key = (name, args)
+    ref = _interned_types.get(key)
+    if ref is None:
+        ref = _interned_types[key] = TypeRef(sys.intern(name), args)
+    return ref
+
+def field_ref(name: str, type: TypeRef) -> Field:
+    """Returns the canonical Field for name: type."""
+    key = (name, type)
+    ref = _interned_fields.get(key)
+    if ref is None:
+        ref = _interned_fields[key] = Field(sys.intern(name), type)
+    return ref
+
+def param_tuple(fields) -> Tuple[Field, ...]:
+    """Returns a shared immutable tuple for a parameter or field list."""
+    key = tuple(fields)
+    return _interned_params.setdefault(key, key)
+
+def _shared_params(cls, name, params, *rest):
+    """Unpickles a node with a parameter/field tuple, restoring param_tuple sharing."""
+    return cls(name, param_tuple(params), *rest)
+
+@dataclass(slots=True)
 class FunctionSpec:
     name: str
-    params: List[Field]
+    params: Tuple[Field, ...]
     return_type: TypeRef
     body: Optional[str] = None # Added for function body support (effects/logic)
 
-@dataclass
+    def __reduce__(self):
+        return (_shared_params, (FunctionSpec, self.name, self.params, self.return_type, self.body))
+
+@dataclass(slots=True)
 class StateSpec:
     name: str
-    fields: List[Field]
+    fields: Tuple[Field, ...]
 
-@dataclass
+    def __reduce__(self):
+        return (_shared_params, (StateSpec, self.name, self.fields))
+
+@dataclass(slots=True)
 class EffectSpec:
     name: str
     operations: List[FunctionSpec] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class WorkflowSpec:
     name: str
-    params: List[Field]
+    params: Tuple[Field, ...]
     steps: List[str] = field(default_factory=list)
-
-@dataclass
+    sources: Tuple[Tuple[str, str], ...] = () # (step name, body) as written, lowered on demand
+    _ir: Optional[Tuple['StepIR', ...]] = field(default=None, init=False, repr=False, compare=False)
+
+    def __reduce__(self):
+        return (_shared_params, (WorkflowSpec, self.name, self.params, self.steps, self.sources))
+
+    @property
+    def ir(self) -> Tuple['StepIR', ...]:
+        """
+        Step bodies lowered to IR (see kernel/workflow_ir.py) on first use. Lowering depends
+        on the current effect bindings, so the IR is never pickled into the spec cache.
+        """
+        if self._ir is None:
+            from .workflow_ir import parse_step
+            self._ir = tuple(parse_step(name, body) for name, body in self.sources)
+        return self._ir
+
+    @property
+    def compilable(self) -> bool:
+        """True if every step lowers to IR, i.e. the workflow runs without synthesis."""
+        return bool(self.ir) and all(step.compilable for step in self.ir)
+
+@dataclass(slots=True)
 class ComponentSpec:
     name: str
     description: str = ""
@@ -109,7 +182,7 @@ class ComponentSpec:
     constraints: List[str] = field(default_factory=list)
     workflows: List[WorkflowSpec] = field(default_factory=list) # Add support for nested workflows
 
-@dataclass
+@dataclass(slots=True)
 class SystemSpec:
     name: str
     metadata: Dict[str, str] = field(default_factory=dict)
@@ -117,150 +190,92 @@ class SystemSpec:
     effects: List[EffectSpec] = field(default_factory=list)
     workflows: List[WorkflowSpec] = field(default_factory=list)
     imports: List[str] = field(default_factory=list)
+    _index: Optional[SpecIndex] = field(default=None, init=False, repr=False, compare=False)
 
-# --- Transformer ---
-
-class AISpecTransformer(Transformer):
-    def start(self, items):
-        system = items[-1]
-        if len(items) > 1 and isinstance(items[0], dict):
-            system.metadata = items[0]
-        return system
-
-    def meta_def(self, items):
-        return {k: v for k, v in items}
-
-    def meta_field(self, items):
-        return (items[0].value, items[1].value.strip('"'))
-
-    def system_def(self, items):
-        name = items[0].value
-        components = [i for i in items[1:] if isinstance(i, ComponentSpec)]
-        effects = [i for i in items[1:] if isinstance(i, EffectSpec)]
-        workflows = [i for i in items[1:] if isinstance(i, WorkflowSpec)]
-        imports = [i for i in items[1:] if isinstance(i, str)]
-        return SystemSpec(name=name, components=components, effects=effects, workflows=workflows, imports=imports)
-
-    def component_block(self, items):
-        name = items[0].value
-        spec = ComponentSpec(name=name)
-        for item in items[1:]:
-            if isinstance(item, tuple) and item[0] == 'desc':
-                spec.description = item[1]
-            elif isinstance(item, StateSpec):
-                spec.states.append(item)
-            elif isinstance(item, FunctionSpec):
-                spec.functions.append(item)
-            elif isinstance(item, WorkflowSpec):
-                spec.workflows.append(item)
-            elif isinstance(item, tuple) and item[0] == 'invariant':
-                spec.invariants.append(item[1])
-            elif isinstance(item, tuple) and item[0] == 'constraint':
-                spec.constraints.append(item[1])
-        return spec
-    
-    def component_decl(self, items):
-        return ComponentSpec(name=items[0].value)
-
-    def effect_block(self, items):
-        name = items[0].value
-        ops = [i for i in items[1:] if isinstance(i, FunctionSpec)]
-        return EffectSpec(name=name, operations=ops)
-
-    def workflow_def(self, items):
-        name = items[0].value
-        params = items[1]
-        steps = [i for i in items[2:] if isinstance(i, str)] # Simplified steps
-        return WorkflowSpec(name=name, params=params, steps=steps)
-
-    def import_stmt(self, items):
-        return items[0].value
-
-    def description(self, items):
-        return ('desc', items[0].value.strip('"'))
-
-    def state_def(self, items):
-        name = items[0].value
-        fields = items[1]
-        return StateSpec(name=name, fields=fields)
+    @property
+    def index(self) -> SpecIndex:
+        """Name index over this system, built on first use and rebuilt if the node lists grew or shrank."""
+        if self._index is None or self._index.is_stale(self):
+            self._index = SpecIndex(self)
+        return self._index
 
-    def function_def(self, items):
-        name = items[0].value
-        params = items[1] or []
-        ret_type = items[2]
-        return FunctionSpec(name=name, params=params, return_type=ret_type)
+    def component(self, name: str) -> Optional[ComponentSpec]:
+        return self.index.components.get(name)
 
-    def function_def_body(self, items):
-        name = items[0].value
-        params = items[1] or []
-        ret_type = items[2]
-        body = items[3]
-        return FunctionSpec(name=name, params=params, return_type=ret_type, body=body)
+    def function(self, component: str, name: str) -> Optional[FunctionSpec]:
+        return self.index.functions.get(f"{component}.{name}")
 
-    def func_body(self, items):
-        return items[0].value.strip()
+    def effect_operation(self, effect: str, name: str) -> Optional[FunctionSpec]:
+        return self.index.operations.get(f"{effect}.{name}")
 
-    def effect_op(self, items):
-        # Maps operation to FunctionSpec for simplicity
-        name = items[0].value
-        params = items[1] or []
-        ret_type = items[2]
-        return FunctionSpec(name=name, params=params, return_type=ret_type)
+    def workflow(self, name: str) -> Optional[WorkflowSpec]:
+        """Looks up 'Name' (system-level) or 'Component.Name'."""
+        return self.index.workflows.get(name)
 
-    def workflow_step(self, items):
-        return f"Step {items[0].value}: {items[1].value.strip()}"
-
-    def invariant(self, items):
-        return ('invariant', items[0].value.strip())
-
-    def constraint(self, items):
-        return ('constraint', items[0].value.strip())
-
-    def field_list(self, items):
-        return items
-
-    def param_list(self, items):
-        return items
-
-    def field_decl(self, items):
-        return Field(name=items[0].value, type=items[1])
-
-    def type_simple(self, items):
-        return TypeRef(name=items[0].value)
-
-    def type_list(self, items):
-        return TypeRef(name="List", args=items[0])
-
-    def type_map(self, items):
-        return TypeRef(name="Map", args=items[0])
-
-    def type_result(self, items):
-        return TypeRef(name="Result", args=items[0])
-
-    def generic_args(self, items):
-        return [i for i in items if isinstance(i, TypeRef)]
-    
-    def logic_expr(self, items):
-        return items[0]
+    def components_performing(self, effect: str) -> List[ComponentSpec]:
+        """Reverse index: components whose functions or workflows perform the given effect."""
+        return self.index.performers.get(effect, [])
 
 # --- Compiler API ---
 
 class Compiler:
-    def __init__(self):
-        self.parser = Lark(AISPEC_GRAMMAR, start='start', parser='lalr')
-        self.transformer = AISpecTransformer()
+    def __init__(self, cache: Optional[SpecCache] = None):
+        self.cache = cache
+        # Built lazily: cache hits never import the parser module or need the LALR tables
+        self._parser = None
+        self._transformer = None
+
+    @property
+    def parser(self):
+        if self._parser is None:
+            from .spec_parser import make_parser
+            self._parser = make_parser()
+        return self._parser
+
+    @property
+    def transformer(self):
+        if self._transformer is None:
+            from .spec_parser import AISpecTransformer
+            self._transformer = AISpecTransformer()
+        return self._transformer
 
     def compile(self, source_code: str) -> SystemSpec:
         tree = self.parser.parse(source_code)
         return self.transformer.transform(tree)
 
     def compile_file(self, file_path: str) -> SystemSpec:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return self.compile(f.read())
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+
+        if self.cache is None:
+            return self.compile(raw.decode('utf-8'))
+
+        key = self.cache.key_for(raw, GRAMMAR_VERSION)
+        spec = self.cache.get(key)
+        if spec is None:
+            spec = self.compile(raw.decode('utf-8'))
+            try:
+                self.cache.put(key, spec)
+            except OSError:
+                pass # A read-only cache dir must never break compilation
+        return spec
+
+    def compile_incremental(self, file_path: str, previous: Optional[SystemSpec] = None, link=None):
+        """
+        Re-compiles a single changed spec file and diffs it against the previous AST.
+        Returns (spec, SpecDiff). Unchanged files are served from the cache without parsing.
+        `link`, if given, resolves the fresh AST's imports before diffing, so a linked
+        `previous` is compared against a linked spec.
+        """
+        from .spec_diff import diff_specs
+        spec = self.compile_file(file_path)
+        if link is not None:
+            spec = link(spec)
+        return spec, diff_specs(previous, spec)
     
     def validate_syntax(self, code: str) -> bool:
         try:
             self.parser.parse(code)
             return True
         except Exception:
-            return False
+            return False
\ No newline at end of file
@@ -0,0 +1,40 @@
+import sys
+import threading
+from contextlib import contextmanager
+
+# Serializes terminal output when several components are built concurrently.
+# Inside `prefixed(name)`, output is buffered per thread and emitted one whole
+# line at a time as "[name] line", so streamed tokens never interleave mid-line.
+_lock = threading.RLock()
+_local = threading.local()
+
+@contextmanager
+def prefixed(prefix: str):
+    previous = getattr(_local, "prefix", None), getattr(_local, "buffer", "")
+    _local.prefix, _local.buffer = prefix, ""
+    try:
+        yield
+    finally:
+        if _local.buffer:
+            _emit(_local.buffer)
+        _local.prefix, _local.buffer = previous
+
+def _emit(line: str):
+    with _lock:
+        sys.stdout.write(f"[{_local.prefix}] {line}\n")
+        sys.stdout.flush()
+
+def write(text: str):
+    """Writes text as-is (outside `prefixed`) or line-buffered with the thread's prefix."""
+    if getattr(_local, "prefix", None) is None:
+        with _lock:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+        return
+    _local.buffer += text
+    *lines, _local.buffer = _local.buffer.split("\n")
+    for line in lines:
+        _emit(line)
+
+def say(message: str = ""):
+    write(message + "\n")
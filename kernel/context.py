@@ -0,0 +1,146 @@
+import re
+import yaml
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from . import console
+from .compiler import ComponentSpec
+from .telemetry import count_tokens
+
+# Default token budget for the test/error context added to one prompt
+DEFAULT_CONTEXT_BUDGET = 1500
+
+# Errors are reported as "[tests/tests.x.yaml] test_name: message"
+_TAGGED_ERROR = re.compile(r"^\[(?P<file>[^\]]+)\]\s*(?P<message>.*)$", re.DOTALL)
+
+@dataclass
+class AssembledContext:
+    text: str
+    tokens: int
+    baseline_tokens: int # What the unpruned context would have cost
+    dropped: int = 0     # Tests or error lines left out to meet the budget
+
+    @property
+    def saved(self) -> int:
+        return max(0, self.baseline_tokens - self.tokens)
+
+def group_errors(errors: List[str]) -> Dict[str, List[str]]:
+    """Groups '[test_file] message' errors by test file. Untagged errors go under ''."""
+    groups: Dict[str, List[str]] = {}
+    for error in errors:
+        m = _TAGGED_ERROR.match(error)
+        file, message = (m.group("file"), m.group("message")) if m else ("", error)
+        groups.setdefault(file, []).append(message)
+    return groups
+
+class ContextAssembler:
+    """
+    Builds the test/error context of synthesis and repair prompts from only what
+    concerns one component, within a token budget:
+
+    - synthesis: the component's tests, one per function first, then the rest
+    - repair: that component's de-duplicated error lines, the failing tests, and
+      the spec fragments (signatures, invariants) those tests exercise
+
+    Token counts use telemetry.count_tokens, so they match the Builder's metrics.
+    """
+    def __init__(self, model: Optional[str] = None, budget: int = DEFAULT_CONTEXT_BUDGET):
+        self.model = model
+        self.budget = budget
+        self.tokens_saved = 0
+        self.calls = 0
+
+    def _count(self, text: str) -> int:
+        return count_tokens(text, self.model)
+
+    def _finish(self, text: str, baseline: str, dropped: int, label: str) -> AssembledContext:
+        context = AssembledContext(text, self._count(text), self._count(baseline), dropped)
+        self.tokens_saved += context.saved
+        self.calls += 1
+        console.say(f"  ✂️  [Context] {label}: {context.tokens} tokens "
+                    f"(saved {context.saved} of {context.baseline_tokens}, budget {self.budget}"
+                    + (f", dropped {dropped}" if dropped else "") + ")")
+        return context
+
+    @staticmethod
+    def _load_tests(test_yaml: str) -> Optional[dict]:
+        try:
+            config = yaml.safe_load(test_yaml)
+        except yaml.YAMLError:
+            return None
+        return config if isinstance(config, dict) and isinstance(config.get("tests"), list) else None
+
+    def _fit_tests(self, header: str, config: dict, tests: List[dict]) -> tuple:
+        """Adds tests in order while the rendered context stays within budget (at least one is kept)."""
+        chosen: List[dict] = []
+        for test in tests:
+            candidate = header + self._dump(config, chosen + [test])
+            if chosen and self._count(candidate) > self.budget:
+                break
+            chosen.append(test)
+        return header + self._dump(config, chosen), len(tests) - len(chosen)
+
+    @staticmethod
+    def _dump(config: dict, tests: List[dict]) -> str:
+        slim = {k: v for k, v in config.items() if k != "tests"}
+        slim["tests"] = tests
+        return yaml.safe_dump(slim, sort_keys=False, allow_unicode=True)
+
+    def for_synthesis(self, spec: ComponentSpec, test_yaml: str) -> AssembledContext:
+        header = "\nCRITICAL: The implementation MUST pass the following tests:\n\n"
+        baseline = header + test_yaml
+        config = self._load_tests(test_yaml)
+        if config is None:
+            return self._finish(baseline, baseline, 0, spec.name) # Unparseable: pass through untouched
+
+        names = {f.name for f in spec.functions}
+        relevant = [t for t in config["tests"] if isinstance(t, dict) and (not names or t.get("function") in names)]
+        # Breadth first: one test per function before a second test of any function
+        first, rest, seen = [], [], set()
+        for test in relevant:
+            (rest if test.get("function") in seen else first).append(test)
+            seen.add(test.get("function"))
+        text, dropped = self._fit_tests(header, config, first + rest)
+        return self._finish(text, baseline, dropped, spec.name)
+
+    def for_repair(self, spec: ComponentSpec, errors: List[str], test_yaml: Optional[str] = None,
+                   baseline_errors: Optional[List[str]] = None) -> AssembledContext:
+        """
+        `errors` are this component's error messages; `baseline_errors` is the full error
+        log the prompt would otherwise have carried (for the savings report).
+        """
+        unique = list(dict.fromkeys(e.strip() for e in errors if e.strip()))
+        baseline = "\n".join(baseline_errors if baseline_errors is not None else errors)
+        if test_yaml:
+            baseline += f"\n\nRELATED TEST FILE:\n{test_yaml}"
+
+        config = self._load_tests(test_yaml) if test_yaml else None
+        failing_names = {e.split(":", 1)[0].strip() for e in unique}
+        failing = [t for t in (config or {}).get("tests", [])
+                   if isinstance(t, dict) and t.get("name") in failing_names]
+
+        # Spec fragments for the functions the failing tests call
+        called = {t.get("function") for t in failing}
+        fragments = [f"  {f.name}({', '.join(f'{p.name}: {p.type.name}' for p in f.params)}) -> {f.return_type.name}"
+                     for f in spec.functions if f.name in called]
+        spec_text = ""
+        # First line only: an invariant's logic expression can run on into the following members
+        invariants = [f"  * {i.strip().splitlines()[0]}" for i in spec.invariants if i.strip()]
+        if fragments or invariants:
+            spec_text = f"\n\nSPEC ({spec.name}):\n" + "\n".join(fragments + invariants)
+
+        # Error lines are the most important part: keep as many as fit
+        lines, dropped = [], 0
+        for error in unique:
+            if lines and self._count("\n".join(lines + [error]) + spec_text) > self.budget:
+                dropped += 1
+                continue
+            lines.append(error)
+        text = "\n".join(lines) + spec_text
+
+        if failing:
+            fitted, skipped = self._fit_tests(text + "\n\nFAILING TESTS:\n", config, failing)
+            if self._count(fitted) <= self.budget:
+                text, dropped = fitted, dropped + skipped
+            else:
+                dropped += len(failing)
+        return self._finish(text, baseline, dropped, spec.name)
@@ -0,0 +1,58 @@
+import re
+from typing import Dict, Optional, Sequence
+from . import effects
+
+# Maps spec-level 'perform Effect.operation(args)' calls onto kernel.effects objects.
+# Templates are Python expressions over the argument sources ({0}, {1}, ...), so the
+# same table serves both the workflow interpreter (eval) and code generation (text).
+BINDINGS: Dict[tuple, str] = {
+    ("MessageBus", "send"): "SendMessage(Message(recipient={0}, content={1}))",
+    ("MessageBus", "broadcast"): "SendMessage(Message(recipient=None, content={0}, broadcast=True))",
+    ("User", "listen"): "Listen(UserInput())",
+    ("User", "reply"): "Reply(UserOutput(message={0}))",
+    ("System", "recurse"): "Recurse(SubTask(query={1}, context='', spec_path={0}))",
+    ("FileSystem", "read"): "ReadFile(FileRead(path={0}))",
+    ("FileSystem", "write"): "WriteFile(FileWrite(path={0}, content={1}))",
+    ("Math", "add"): "Math(MathOperation(op='add', a={0}, b={1}))",
+    ("Math", "sub"): "Math(MathOperation(op='sub', a={0}, b={1}))",
+    ("Math", "mul"): "Math(MathOperation(op='mul', a={0}, b={1}))",
+    ("Math", "div"): "Math(MathOperation(op='div', a={0}, b={1}))",
+}
+
+# Every LLM operation (generate, think, reflect, ...) is a plain text generation request
+LLM_EFFECT = "LLM"
+LLM_TEMPLATE = 'Generate(LLMRequest(messages=[{{"role": "user", "content": {content}}}]))'
+
+# Names the rendered expressions may reference
+EFFECT_NAMESPACE = {
+    name: getattr(effects, name)
+    for name in ("Generate", "LLMRequest", "SendMessage", "Message", "Listen", "UserInput",
+                 "Reply", "UserOutput", "Recurse", "SubTask", "ReadFile", "FileRead",
+                 "WriteFile", "FileWrite", "Math", "MathOperation")
+}
+
+def render_effect(effect: str, operation: str, args: Sequence[str]) -> Optional[str]:
+    """
+    Returns a Python expression constructing the effect object, or None if the
+    operation has no binding or is called with the wrong number of arguments.
+    """
+    if effect == LLM_EFFECT:
+        if not args:
+            return None
+        if len(args) == 1:
+            content = f"str({args[0]})"
+        else:
+            content = '" ".join([' + ", ".join(f"str({a})" for a in args) + "])"
+        return LLM_TEMPLATE.format(content=content)
+
+    template = BINDINGS.get((effect, operation))
+    if template is None:
+        return None
+    arity = sum(1 for i in range(4) if f"{{{i}}}" in template)
+    if arity != len(args):
+        return None
+    return template.format(*args)
+
+def imported_names(expression: str) -> list:
+    """kernel.effects names used by a rendered expression, for generating import lines."""
+    return sorted(name for name in EFFECT_NAMESPACE if re.search(rf"\b{name}\(", expression))
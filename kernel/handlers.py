@@ -1,23 +1,20 @@
 import os
 import io
 import sys
-import litellm
+import json
+import hashlib
 import importlib.util
 from typing import Dict, Any, Optional
 from .semantic_kernel import Handler, Effect, perform
 from .effects import Generate, ExecuteCode, ReadFile, WriteFile, Recurse, LLMRequest, Math, Listen, Reply, SendMessage, SubTask
 
-# Safe Execution Imports (from recursive-llm wisdom)
-from RestrictedPython import compile_restricted_exec, safe_globals, limited_builtins, utility_builtins
-from RestrictedPython.Guards import guarded_iter_unpack_sequence, safer_getattr
-from RestrictedPython.PrintCollector import PrintCollector
-
 class LiteLLMHandler(Handler):
     def __init__(self, default_model: str = "qwen2.5:3b"):
         self.default_model = default_model
 
     def handle(self, effect: Effect) -> Any:
         if isinstance(effect, Generate):
+            import litellm # Deferred: only needed once an LLM effect is actually performed
             req: LLMRequest = effect.payload
             response = litellm.completion(
                 model=req.model or self.default_model,
@@ -27,6 +24,75 @@ class LiteLLMHandler(Handler):
             return response.choices[0].message.content
         raise NotImplementedError
 
+class CassetteMiss(Exception):
+    """A Generate effect with no recorded response in replay mode."""
+
+class CassetteHandler(Handler):
+    """
+    Record/replay for Generate effects, so LLM-backed components can be verified
+    offline and deterministically.
+
+    - record: answers through `inner` (a live LiteLLMHandler) and stores each
+      request/response pair in the cassette directory
+    - replay: answers only from the cassette and raises CassetteMiss for any
+      request that was never recorded
+
+    Requests are keyed by the model and the messages with roles lower-cased and
+    whitespace collapsed, so formatting-only prompt changes still replay. Each pair
+    is its own JSON file, written atomically, so parallel recorders do not clash.
+    """
+    MODES = ("record", "replay")
+
+    def __init__(self, cassette_dir: str, mode: str = "replay", inner: Optional[LiteLLMHandler] = None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}' (expected one of {', '.join(self.MODES)})")
+        self.cassette_dir = cassette_dir
+        self.mode = mode
+        self.inner = inner or LiteLLMHandler()
+
+    def normalize(self, req: LLMRequest) -> dict:
+        return {
+            "model": req.model or self.inner.default_model,
+            "messages": [{"role": str(m.get("role", "")).strip().lower(), "content": " ".join(str(m.get("content", "")).split())}
+                         for m in req.messages],
+            "stop": sorted(req.stop) if req.stop else None,
+        }
+
+    def key_for(self, request: dict) -> str:
+        payload = json.dumps(request, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32] + ".json"
+
+    def handle(self, effect: Effect) -> Any:
+        if not isinstance(effect, Generate):
+            raise NotImplementedError
+        request = self.normalize(effect.payload)
+        path = os.path.join(self.cassette_dir, self.key_for(request))
+        if self.mode == "replay":
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)["response"]
+            except (OSError, ValueError, KeyError):
+                last = request["messages"][-1]["content"] if request["messages"] else ""
+                raise CassetteMiss(f"No recorded response in {self.cassette_dir} for {request['model']} "
+                                   f"prompt '{last[:60]}' (record it with 'verify --record' or SPAK_CASSETTE=record)") from None
+        response = self.inner.handle(effect)
+        os.makedirs(self.cassette_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"request": request, "response": response}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return response
+
+    def fingerprint(self) -> str:
+        """Changes whenever a recording is added or re-recorded."""
+        h = hashlib.sha256(f"{self.mode}:{self.inner.default_model}".encode("utf-8"))
+        if self.mode == "replay" and os.path.isdir(self.cassette_dir):
+            for entry in sorted(os.scandir(self.cassette_dir), key=lambda e: e.name):
+                if entry.name.endswith(".json"):
+                    st = entry.stat()
+                    h.update(f"{entry.name}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+        return h.hexdigest()
+
 class SafeREPLHandler(Handler):
     """
     Highly secure Python REPL Handler inspired by recursive-llm.
@@ -42,6 +108,11 @@ class SafeREPLHandler(Handler):
         raise NotImplementedError
 
     def _execute_safe(self, code: str) -> str:
+        # Safe Execution Imports (from recursive-llm wisdom)
+        from RestrictedPython import compile_restricted_exec, safe_globals, limited_builtins, utility_builtins
+        from RestrictedPython.Guards import guarded_iter_unpack_sequence, safer_getattr
+        from RestrictedPython.PrintCollector import PrintCollector
+
         # Build restricted globals (The wisdom from recursive-llm)
         restricted_globals = safe_globals.copy()
         restricted_globals.update(limited_builtins)
@@ -148,30 +219,14 @@ class RecursiveAgentHandler(Handler):
             if not spec_path or not os.path.exists(spec_path):
                  return f"Error: Spec file '{spec_path}' not found."
 
-            # 1. Compile the Spec (We reuse the Compiler via a fresh import or just use the file)
-            # For simplicity, we assume the code is already built in 'src/' for now, 
-            # OR we could trigger a build. Let's assume built for this prototype.
-            
-            # We need to find the component name from the spec to load the module
-            # Ideally, we'd use the Compiler to parse it, but let's do a quick cheat or assume naming convention.
-            # "SPEC.level2.md" -> system "CalculatorAgent" -> component "Solver" (we need to know this)
-            
-            # Let's map spec_path to module/class manually or use Compiler if available.
-            # To be robust, let's look at the filename mapping we used:
-            # SPEC.level2.md -> CalculatorAgent. 
-            # We need to instantiate the Main Component. 
-            # For Level 2, it is 'Solver' in 'src/solver.py'.
-            
-            # HACK: For the demo, we map:
-            # specs/SPEC.level2.md -> src/solver.py, class Solver
-            
-            module_name = "solver"
-            class_name = "Solver"
+            # 1. Compile the Spec and resolve the entry component through the name index
+            # (we assume the code is already built in 'src/' for this prototype).
             method_name = "calculate" # The entry point? Or do we need a standard entry point?
+            providers = self._components_providing(spec_path, method_name)
             
-            if "level2" in spec_path:
-                module_name = "solver"
-                class_name = "Solver"
+            if providers:
+                class_name = providers[0].name
+                module_name = class_name.lower()
                 # Level 2 Solver needs specific args (a, b, op), but Recurse sends a string query.
                 # The Sub-Agent needs an adapter or an LLM to parse the query into args.
                 # This is why Level 5 usually needs a "Generalist" sub-agent or the sub-agent needs a "Natural Language Interface".
@@ -223,3 +278,17 @@ class RecursiveAgentHandler(Handler):
             return "Error: Could not determine how to run sub-agent."
             
         raise NotImplementedError
+
+    _compiler = None
+
+    def _components_providing(self, spec_path: str, function_name: str) -> list:
+        """Components of the spec at spec_path that declare function_name."""
+        from .compiler import Compiler
+        from .cache import SpecCache
+        if RecursiveAgentHandler._compiler is None:
+            RecursiveAgentHandler._compiler = Compiler(cache=SpecCache())
+        try:
+            spec = RecursiveAgentHandler._compiler.compile_file(spec_path)
+        except Exception:
+            return []
+        return [comp for comp, _ in spec.index.functions_by_name.get(function_name, [])]
@@ -0,0 +1,115 @@
+import os
+import gzip
+import json
+import time
+import struct
+import threading
+from collections import deque
+from typing import List, Optional
+from .cache import DEFAULT_CACHE_ROOT
+
+DEFAULT_HISTORY_DIR = os.path.join(DEFAULT_CACHE_ROOT, "history")
+
+# Session logs kept in DEFAULT_HISTORY_DIR; older ones are pruned when a new session starts
+DEFAULT_KEEP_SESSIONS = 20
+DEFAULT_MAX_HISTORY_BYTES = 64 * 1024 * 1024
+
+_OFFSET = struct.Struct(">Q")
+
+class HistoryLog:
+    """
+    Append-only conversation log for one session.
+
+    Every entry is written as its own gzip member to `<name>.jsonl.gz` (so the file
+    stays a valid gzip stream, readable with zcat), and the member's byte offset is
+    appended to `<name>.idx` as a fixed 8-byte integer. Reading entry i therefore
+    means two seeks and decompressing a single member, whatever the log size.
+    The most recent entries are also kept in a bounded ring buffer in memory.
+    """
+    def __init__(self, path: Optional[str] = None, ring_size: int = 32):
+        if path is None:
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl.gz"
+            path = os.path.join(DEFAULT_HISTORY_DIR, name)
+            prune_sessions(DEFAULT_HISTORY_DIR)
+        self.path = path
+        self.index_path = path[:-len(".jsonl.gz")] + ".idx" if path.endswith(".jsonl.gz") else path + ".idx"
+        self.recent = deque(maxlen=ring_size)
+        self._lock = threading.Lock()
+        self._count = os.path.getsize(self.index_path) // _OFFSET.size if os.path.exists(self.index_path) else 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, entry: dict):
+        member = gzip.compress((json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "ab") as log:
+                offset = log.seek(0, os.SEEK_END)
+                log.write(member)
+            with open(self.index_path, "ab") as index:
+                index.write(_OFFSET.pack(offset))
+            self._count += 1
+            self.recent.append(entry)
+
+    def last(self, n: int) -> List[dict]:
+        """The last n entries, oldest first. Reads the disk only for entries older than the ring buffer."""
+        with self._lock:
+            n = max(0, min(n, self._count))
+            if n <= len(self.recent):
+                return list(self.recent)[len(self.recent) - n:]
+            return self._read_range(self._count - n, self._count)
+
+    def entry(self, i: int) -> dict:
+        with self._lock:
+            if not 0 <= i < self._count:
+                raise IndexError(i)
+            return self._read_range(i, i + 1)[0]
+
+    def _read_range(self, start: int, stop: int) -> List[dict]:
+        with open(self.index_path, "rb") as index:
+            index.seek(start * _OFFSET.size)
+            # One extra offset (if present) marks where the last requested member ends
+            raw = index.read((stop - start + 1) * _OFFSET.size)
+        offsets = [_OFFSET.unpack_from(raw, i)[0] for i in range(0, len(raw), _OFFSET.size)]
+        entries = []
+        with open(self.path, "rb") as log:
+            log.seek(offsets[0])
+            end = offsets[stop - start] if len(offsets) > stop - start else None
+            data = log.read(end - offsets[0]) if end is not None else log.read()
+        for i in range(stop - start):
+            lo = offsets[i] - offsets[0]
+            hi = offsets[i + 1] - offsets[0] if i + 1 < len(offsets) else len(data)
+            entries.append(json.loads(gzip.decompress(data[lo:hi])))
+        return entries
+
+def prune_sessions(directory: str, keep: int = DEFAULT_KEEP_SESSIONS,
+                   max_bytes: int = DEFAULT_MAX_HISTORY_BYTES) -> int:
+    """
+    Deletes the oldest session logs (and their indexes) in directory until at most
+    `keep` remain and together they fit in max_bytes. Returns the number removed.
+    """
+    try:
+        sessions = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and entry.name.endswith(".jsonl.gz"):
+                index_path = entry.path[:-len(".jsonl.gz")] + ".idx"
+                size = entry.stat().st_size + (os.path.getsize(index_path) if os.path.exists(index_path) else 0)
+                sessions.append((entry.stat().st_mtime, entry.path, index_path, size))
+    except OSError:
+        return 0
+    sessions.sort()
+    total = sum(size for *_, size in sessions)
+    removed = 0
+    for _, path, index_path, size in sessions:
+        if len(sessions) - removed <= keep and total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            if os.path.exists(index_path):
+                os.remove(index_path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
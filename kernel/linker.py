@@ -0,0 +1,151 @@
+import os
+from typing import Dict, List, Optional, Tuple
+from .compiler import Compiler, SystemSpec
+
+class LinkError(Exception):
+    pass
+
+class Linker:
+    """
+    Resolves `import NAME` statements to the spec files defining system NAME and
+    links their components, effects and workflows into the importing system.
+
+    Every imported module is compiled at most once per session (per file version),
+    so a shared spec imported by many systems is parsed once and its AST nodes are
+    shared by all of them.
+    """
+    def __init__(self, compiler: Compiler, search_paths: Tuple[str, ...] = ("specs",)):
+        self.compiler = compiler
+        self.search_paths = list(search_paths)
+        self._modules: Dict[str, Tuple[tuple, SystemSpec]] = {} # abs path -> (file version, AST)
+        self._system_paths: Dict[str, str] = {}                 # system name -> abs path
+        self.compiles = 0
+
+    # --- Module table ---
+
+    @staticmethod
+    def _version(path: str) -> tuple:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def remember(self, path: str, spec: SystemSpec):
+        """Registers an already-compiled spec so importing it never re-parses."""
+        path = os.path.abspath(path)
+        self._modules[path] = (self._version(path), spec)
+        self._system_paths[spec.name] = path
+
+    def load(self, path: str) -> SystemSpec:
+        path = os.path.abspath(path)
+        version = self._version(path)
+        cached = self._modules.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        spec = self.compiler.compile_file(path)
+        self.compiles += 1
+        self._modules[path] = (version, spec)
+        self._system_paths[spec.name] = path
+        return spec
+
+    # --- Resolution ---
+
+    def _candidate_dirs(self, base_dir: Optional[str]) -> List[str]:
+        dirs = [base_dir] if base_dir else []
+        dirs.extend(self.search_paths)
+        seen, result = set(), []
+        for d in dirs:
+            d = os.path.abspath(d)
+            if d not in seen and os.path.isdir(d):
+                seen.add(d)
+                result.append(d)
+        return result
+
+    def resolve(self, name: str, base_dir: Optional[str] = None) -> str:
+        """Returns the path of the spec file defining system `name`."""
+        known = self._system_paths.get(name)
+        if known and os.path.exists(known):
+            return known
+
+        dirs = self._candidate_dirs(base_dir)
+        # 1. Naming convention: SPEC.<name>.md (case-insensitive), no parsing needed
+        for d in dirs:
+            for file in sorted(os.listdir(d)):
+                if file.lower() == f"spec.{name.lower()}.md":
+                    path = os.path.join(d, file)
+                    if self.load(path).name == name:
+                        return os.path.abspath(path)
+
+        # 2. Fall back to compiling every spec in the search path (each at most once)
+        for d in dirs:
+            for root, _, files in os.walk(d):
+                for file in sorted(files):
+                    if file.startswith("SPEC") and file.endswith(".md"):
+                        try:
+                            if self.load(os.path.join(root, file)).name == name:
+                                return self._system_paths[name]
+                        except Exception:
+                            continue # Unrelated broken specs must not block resolution
+        raise LinkError(f"Cannot resolve import '{name}' (searched {', '.join(dirs) or 'nothing'})")
+
+    # --- Graph ---
+
+    def dependency_order(self, spec: SystemSpec, base_dir: Optional[str] = None) -> List[SystemSpec]:
+        """
+        Transitive imports of `spec` in dependency order (dependencies first).
+        Raises LinkError on unresolvable imports or import cycles.
+        """
+        order: List[SystemSpec] = []
+        done = set()
+
+        def visit(node: SystemSpec, node_dir: Optional[str], stack: List[str]):
+            for name in node.imports:
+                if name in done:
+                    continue
+                if name in stack:
+                    cycle = stack[stack.index(name):] + [name]
+                    raise LinkError(f"Import cycle: {' -> '.join(cycle)}")
+                path = self.resolve(name, node_dir)
+                dep = self.load(path)
+                visit(dep, os.path.dirname(path), stack + [name])
+                done.add(name)
+                order.append(dep)
+
+        visit(spec, base_dir, [spec.name])
+        return order
+
+    def dependency_graph(self, spec: SystemSpec, base_dir: Optional[str] = None) -> Dict[str, List[str]]:
+        """Adjacency list {system: [imported systems]} of the import DAG rooted at `spec`."""
+        graph = {spec.name: list(spec.imports)}
+        for dep in self.dependency_order(spec, base_dir):
+            graph[dep.name] = list(dep.imports)
+        return graph
+
+    # --- Linking ---
+
+    def link(self, spec: SystemSpec, base_dir: Optional[str] = None) -> SystemSpec:
+        """
+        Returns a new SystemSpec with the members of all (transitive) imports appended
+        after the system's own. Local definitions win over imported ones of the same name.
+        The input spec and the memoized modules are not modified.
+        """
+        if not spec.imports:
+            return spec
+        linked = SystemSpec(
+            name=spec.name,
+            metadata=dict(spec.metadata),
+            components=list(spec.components),
+            effects=list(spec.effects),
+            workflows=list(spec.workflows),
+            imports=list(spec.imports),
+        )
+        names = {
+            "components": {c.name for c in linked.components},
+            "effects": {e.name for e in linked.effects},
+            "workflows": {w.name for w in linked.workflows},
+        }
+        for dep in self.dependency_order(spec, base_dir):
+            for attr in ("components", "effects", "workflows"):
+                for node in getattr(dep, attr):
+                    if node.name not in names[attr]:
+                        names[attr].add(node.name)
+                        getattr(linked, attr).append(node)
+        return linked
@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+import threading
+import importlib
+import importlib.util
+from collections import OrderedDict
+from types import ModuleType
+from typing import Iterable, List, Optional
+
+# Comma-separated modules to import once in each verification worker, e.g. "litellm,numpy"
+PRELOAD_ENV = "SPAK_VERIFY_PRELOAD"
+
+class ModuleCache:
+    """
+    Component modules loaded from file, keyed by path and reused while their version
+    is unchanged; a changed one is executed again into a new module. The version is
+    the caller's (the verifier passes the SourceIndex digest, which covers the modules
+    the file imports from the same tree), else the file's (mtime, size).
+    Module-level state therefore persists between verification runs of the same
+    source, while every test file still gets a fresh instance of the component.
+    At most `max_entries` modules are kept, least recently used evicted first.
+    """
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._modules: "OrderedDict[str, tuple]" = OrderedDict() # path -> (version, module)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def load(self, path: str, name: str, version: Optional[str] = None,
+             dependencies: Iterable[str] = ()) -> ModuleType:
+        """
+        The module at path, executed again if its version changed. Before that, any
+        of `dependencies` (paths of modules it imports) already in sys.modules are
+        dropped from it, so the new module imports their current code.
+        """
+        path = os.path.abspath(path)
+        st = os.stat(path) # Raises FileNotFoundError like exec_module would
+        if version is None:
+            version = f"{st.st_mtime_ns}:{st.st_size}"
+        with self._lock:
+            cached = self._modules.get(path)
+            if cached is not None and cached[0] == version:
+                self._modules.move_to_end(path)
+                self.hits += 1
+                return cached[1]
+        _forget(dependencies, keep=path)
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        with self._lock:
+            self._modules[path] = (version, module)
+            self._modules.move_to_end(path)
+            while len(self._modules) > self.max_entries:
+                self._modules.popitem(last=False)
+            self.loads += 1
+        return module
+
+    def clear(self):
+        with self._lock:
+            self._modules.clear()
+
+def _forget(paths: Iterable[str], keep: str):
+    """Removes the modules loaded from `paths` (except `keep`) from sys.modules."""
+    stale = {os.path.abspath(p) for p in paths} - {keep}
+    if not stale:
+        return
+    for name, module in list(sys.modules.items()):
+        file = getattr(module, "__file__", None)
+        if file and os.path.abspath(file) in stale:
+            del sys.modules[name]
+
+# Shared by every verification in this process (the REPL, or one pool worker)
+modules = ModuleCache()
+
+def preload_names(names: Optional[str] = None) -> List[str]:
+    """Module names to preload: `names` or SPAK_VERIFY_PRELOAD, comma-separated."""
+    setting = os.environ.get(PRELOAD_ENV, "") if names is None else names
+    return [n.strip() for n in setting.split(",") if n.strip()]
+
+def preload(names: Iterable[str]) -> float:
+    """Imports heavy dependencies up front. Returns the seconds spent; missing modules are skipped."""
+    start = time.perf_counter()
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"⚠️ [Verifier] Could not preload '{name}': {e}")
+    return time.perf_counter() - start
+
+def warm_worker(names: List[str]):
+    """ProcessPoolExecutor initializer: imports the kernel and `names` once per worker process."""
+    from . import verifier # noqa: F401  Handlers, runtime and YAML parsing
+    preload(names)
@@ -0,0 +1,139 @@
+import re
+import ast
+from dataclasses import dataclass
+from typing import List
+
+# Repairs ask the model for edits instead of the whole file. Two formats are accepted:
+#
+#   <<<<<<< SEARCH                      --- a/file.py
+#   exact lines from the file           +++ b/file.py
+#   =======                             @@ -10,2 +10,2 @@
+#   replacement lines                    context
+#   >>>>>>> REPLACE                     -old line
+#                                       +new line
+#
+# Hunk line numbers are ignored: both formats are applied by locating the
+# original text, which tolerates the off-by-N headers models tend to write.
+
+PATCH_FORMAT_INSTRUCTIONS = """Reply ONLY with one or more SEARCH/REPLACE blocks, in this exact format:
+
+<<<<<<< SEARCH
+(exact lines copied from the file, including indentation)
+=======
+(the lines that replace them)
+>>>>>>> REPLACE
+
+Each SEARCH section must match the file exactly once. Keep SEARCH sections short:
+include only the lines that change plus enough context to be unique.
+Do NOT output the full file and do NOT write explanations."""
+
+class PatchError(Exception):
+    pass
+
+@dataclass(frozen=True)
+class Edit:
+    search: str
+    replace: str
+
+_SEARCH_REPLACE = re.compile(
+    r"^<{5,9} ?SEARCH[^\n]*\n(.*?)^={5,9}[ \t]*\n(.*?)^>{5,9} ?REPLACE[^\n]*$",
+    re.MULTILINE | re.DOTALL,
+)
+_HUNK_HEADER = re.compile(r"^@@[^@]*@@", re.MULTILINE)
+
+def _parse_search_replace(text: str) -> List[Edit]:
+    return [Edit(m.group(1), m.group(2)) for m in _SEARCH_REPLACE.finditer(text)]
+
+def _parse_unified_diff(text: str) -> List[Edit]:
+    edits = []
+    old, new = None, None
+    for line in text.splitlines():
+        if _HUNK_HEADER.match(line):
+            if old is not None:
+                edits.append(Edit("".join(old), "".join(new)))
+            old, new = [], []
+        elif old is None or line.startswith(("--- ", "+++ ", "```")):
+            continue
+        elif line.startswith("-"):
+            old.append(line[1:] + "\n")
+        elif line.startswith("+"):
+            new.append(line[1:] + "\n")
+        elif line.startswith(" ") or line == "":
+            old.append(line[1:] + "\n")
+            new.append(line[1:] + "\n")
+        elif line.startswith("\\"):
+            continue # "\ No newline at end of file"
+        else:
+            edits.append(Edit("".join(old), "".join(new)))
+            old, new = None, None # Prose after the diff
+    if old is not None:
+        edits.append(Edit("".join(old), "".join(new)))
+    return [e for e in edits if e.search != e.replace]
+
+def parse_patch(text: str) -> List[Edit]:
+    """Extracts edits from a model response. Raises PatchError if it contains none."""
+    edits = _parse_search_replace(text)
+    if not edits and _HUNK_HEADER.search(text):
+        edits = _parse_unified_diff(text)
+    if not edits:
+        raise PatchError("response contains no SEARCH/REPLACE blocks or diff hunks")
+    return edits
+
+def _locate(source: str, search: str) -> tuple:
+    """Returns (start, end) of the single occurrence of `search`, ignoring trailing whitespace if needed."""
+    count = source.count(search)
+    if count == 1:
+        start = source.index(search)
+        return start, start + len(search)
+    if count > 1:
+        raise PatchError(f"SEARCH text matches {count} times: {search.strip().splitlines()[0][:60]!r}")
+
+    # Fuzzy pass: compare lines with trailing whitespace stripped
+    lines = source.splitlines(keepends=True)
+    wanted = [l.rstrip() for l in search.splitlines()]
+    while wanted and not wanted[-1]:
+        wanted.pop()
+    if not wanted:
+        raise PatchError("empty SEARCH section")
+    matches = [i for i in range(len(lines) - len(wanted) + 1)
+               if all(lines[i + j].rstrip() == wanted[j] for j in range(len(wanted)))]
+    if len(matches) != 1:
+        first = next((l for l in wanted if l.strip()), "")
+        raise PatchError(f"SEARCH text {'not found' if not matches else 'is ambiguous'}: {first.strip()[:60]!r}")
+    start = sum(len(l) for l in lines[:matches[0]])
+    end = start + sum(len(l) for l in lines[matches[0]:matches[0] + len(wanted)])
+    return start, end
+
+def apply_edits(source: str, edits: List[Edit]) -> str:
+    for edit in edits:
+        if not edit.search.strip():
+            raise PatchError("empty SEARCH section")
+        start, end = _locate(source, edit.search)
+        replace = edit.replace
+        if source[start:end].endswith("\n") and replace and not replace.endswith("\n"):
+            replace += "\n"
+        source = source[:start] + replace + source[end:]
+    return source
+
+def validate(text: str, kind: str):
+    """Raises PatchError unless text is valid `kind` ('python' or 'yaml')."""
+    if kind == "python":
+        try:
+            ast.parse(text)
+        except SyntaxError as e:
+            raise PatchError(f"patched code does not parse: {e.msg} (line {e.lineno})")
+    elif kind == "yaml":
+        import yaml
+        try:
+            yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise PatchError(f"patched YAML does not parse: {e}")
+
+def apply_patch(source: str, response: str, kind: str) -> str:
+    """
+    Applies the edits in a model response to source and validates the result.
+    Raises PatchError if the response has no edits, an edit does not apply, or the result is invalid.
+    """
+    patched = apply_edits(source, parse_patch(response))
+    validate(patched, kind)
+    return patched
@@ -50,6 +50,24 @@ class Runtime:
         except Exception as e:
             raise e
 
+    def run(self, agent: Agent, max_steps: int = 10000) -> Any:
+        """
+        Drives the agent's policy generator to completion, sending each
+        handler result back in. Returns the generator's return value.
+        """
+        generator = agent.policy_generator
+        signal = None
+        for _ in range(max_steps):
+            try:
+                effect_or_result = generator.send(signal)
+            except StopIteration as e:
+                return e.value
+            if isinstance(effect_or_result, Effect):
+                signal = self._resolve_effect(effect_or_result)
+            else:
+                signal = effect_or_result
+        raise RuntimeError(f"Agent '{agent.spec.name}' did not finish within {max_steps} steps")
+
     def _resolve_effect(self, effect: Effect) -> Any:
         self.trace.append({"type": "effect", "name": type(effect).__name__, "payload": effect.payload})
         for handler in reversed(self.handlers):
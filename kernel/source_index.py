@@ -0,0 +1,133 @@
+import os
+import ast
+import bisect
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+@dataclass
+class SourceFile:
+    path: str
+    mtime_ns: int
+    size: int
+    digest: str = ""                                            # sha256 of the content
+    classes: Dict[str, Set[str]] = field(default_factory=dict) # Class name -> method names
+    imports: List[str] = field(default_factory=list)           # Imported modules, relative ones with leading dots
+    error: Optional[str] = None                                 # Set if the file does not parse
+
+def parse_source(path: str, mtime_ns: int, size: int) -> SourceFile:
+    entry = SourceFile(path, mtime_ns, size)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        entry.digest = hashlib.sha256(data).hexdigest()
+        tree = ast.parse(data.decode("utf-8"))
+    except Exception as e:
+        entry.error = str(e)
+        return entry
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef) and node.name not in entry.classes:
+            entry.classes[node.name] = {n.name for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))}
+        elif isinstance(node, ast.Import):
+            entry.imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = "." * node.level + (node.module or "")
+            entry.imports.append(module)
+            # 'from pkg import name' may import the submodule pkg.name
+            sep = "" if module.endswith(".") else "."
+            entry.imports.extend(module + sep + alias.name for alias in node.names if alias.name != "*")
+    return entry
+
+class SourceIndex:
+    """
+    Class and method tables of the Python files under a source directory.
+
+    `refresh()` walks the tree once and re-parses only files whose (mtime, size)
+    changed since the last refresh; entries of deleted files are dropped. Lookups
+    by file name prefix are a bisect over the sorted file names, so checking every
+    component of a spec costs one walk plus one lookup each. `digest()` hashes a
+    module together with the modules it imports from the same tree.
+    """
+    def __init__(self, src_dir: str):
+        self.src_dir = os.path.normpath(src_dir)
+        self.files: Dict[str, SourceFile] = {}
+        self._names: List[Tuple[str, str]] = [] # Sorted (file name, path)
+        self.parsed = 0 # Files (re)parsed by the last refresh
+
+    def refresh(self) -> "SourceIndex":
+        seen = {}
+        self.parsed = 0
+        for root, dirs, files in os.walk(self.src_dir):
+            dirs[:] = [d for d in dirs if d != "__pycache__"]
+            for file in files:
+                if not file.endswith(".py"):
+                    continue
+                path = os.path.normpath(os.path.join(root, file))
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entry = self.files.get(path)
+                if entry is None or (entry.mtime_ns, entry.size) != (st.st_mtime_ns, st.st_size):
+                    entry = parse_source(path, st.st_mtime_ns, st.st_size)
+                    self.parsed += 1
+                seen[path] = entry
+        if seen.keys() != self.files.keys():
+            self._names = sorted((os.path.basename(path), path) for path in seen)
+        self.files = seen
+        return self
+
+    def with_prefix(self, prefix: str) -> Iterator[SourceFile]:
+        """Files whose name starts with prefix, in name order (so 'name.py' comes first)."""
+        i = bisect.bisect_left(self._names, (prefix, ""))
+        while i < len(self._names) and self._names[i][0].startswith(prefix):
+            yield self.files[self._names[i][1]]
+            i += 1
+
+    def _resolve(self, importer: str, module: str) -> Optional[str]:
+        """Path of the indexed file that module (as imported by importer) refers to, if any."""
+        name = module.lstrip(".")
+        level = len(module) - len(name)
+        if level:
+            base = os.path.dirname(importer)
+            for _ in range(level - 1):
+                base = os.path.dirname(base)
+        else:
+            base = self.src_dir
+        stem = os.path.normpath(os.path.join(base, *name.split("."))) if name else base
+        for path in (stem + ".py", os.path.join(stem, "__init__.py")):
+            if path in self.files:
+                return path
+        return None
+
+    def dependencies(self, path: str) -> List[SourceFile]:
+        """The indexed file at path and every indexed file it imports, transitively, sorted by path."""
+        path = os.path.normpath(path)
+        pending, seen = [path], set()
+        while pending:
+            current = pending.pop()
+            if current in seen or current not in self.files:
+                continue
+            seen.add(current)
+            pending.extend(filter(None, (self._resolve(current, m) for m in self.files[current].imports)))
+        return [self.files[p] for p in sorted(seen)]
+
+    def digest(self, path: str) -> Optional[str]:
+        """Hash over the content of path and its transitive imports within the index; None if path is not indexed."""
+        files = self.dependencies(path)
+        if not files:
+            return None
+        h = hashlib.sha256()
+        for source in files:
+            h.update(f"{os.path.relpath(source.path, self.src_dir)}:{source.digest}\n".encode("utf-8"))
+        return h.hexdigest()
+
+# Indexes by source directory, reused across verifications in one process
+_indexes: Dict[str, SourceIndex] = {}
+
+def index_for(src_dir: str) -> SourceIndex:
+    """The refreshed index of src_dir."""
+    key = os.path.abspath(src_dir)
+    if key not in _indexes:
+        _indexes[key] = SourceIndex(src_dir)
+    return _indexes[key].refresh()
@@ -0,0 +1,91 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+from .compiler import SystemSpec
+
+@dataclass
+class Changes:
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.modified)
+
+@dataclass
+class SpecDiff:
+    """
+    Structural difference between two compilations of the same system.
+    Qualified names use 'Component.member'; system-level workflows use their bare name.
+    Invariants have no name, so they are keyed by 'Component: <expression>' and can
+    only be added or removed.
+    """
+    system: str
+    components: Changes = field(default_factory=Changes)
+    functions: Changes = field(default_factory=Changes)
+    states: Changes = field(default_factory=Changes)
+    invariants: Changes = field(default_factory=Changes)
+    workflows: Changes = field(default_factory=Changes)
+    effects: Changes = field(default_factory=Changes)
+
+    CATEGORIES = ("components", "functions", "states", "invariants", "workflows", "effects")
+
+    def is_empty(self) -> bool:
+        return not any(getattr(self, c) for c in self.CATEGORIES)
+
+    def affected_components(self) -> Set[str]:
+        """Components whose code or tests need regenerating (added or changed, not removed)."""
+        affected = set(self.components.added) | set(self.components.modified)
+        for category in ("functions", "states", "invariants", "workflows"):
+            changes = getattr(self, category)
+            for name in changes.added + changes.modified + changes.removed:
+                if "." in name or ":" in name: # System-level workflows belong to no component
+                    affected.add(name.split(":")[0].split(".")[0])
+        return affected - set(self.components.removed)
+
+    def summary(self) -> List[str]:
+        lines = []
+        for category in self.CATEGORIES:
+            changes = getattr(self, category)
+            for sign, names in (("+", changes.added), ("-", changes.removed), ("~", changes.modified)):
+                for name in names:
+                    lines.append(f"{sign} {category[:-1]} {name}")
+        return lines
+
+def _compare(old: Dict[str, object], new: Dict[str, object]) -> Changes:
+    return Changes(
+        added=[k for k in new if k not in old],
+        removed=[k for k in old if k not in new],
+        modified=[k for k in new if k in old and new[k] != old[k]],
+    )
+
+def _members(spec: SystemSpec):
+    functions, states, invariants, workflows = {}, {}, {}, {}
+    for comp in spec.components:
+        for f in comp.functions:
+            functions[f"{comp.name}.{f.name}"] = f
+        for s in comp.states:
+            states[f"{comp.name}.{s.name}"] = s
+        for inv in comp.invariants:
+            invariants[f"{comp.name}: {inv}"] = inv
+        for w in comp.workflows:
+            workflows[f"{comp.name}.{w.name}"] = w
+    for w in spec.workflows:
+        workflows[w.name] = w
+    return functions, states, invariants, workflows
+
+def diff_specs(old: Optional[SystemSpec], new: SystemSpec) -> SpecDiff:
+    """Computes the structural diff from `old` to `new`. A missing `old` means everything was added."""
+    if old is None:
+        old = SystemSpec(name=new.name)
+
+    diff = SpecDiff(system=new.name)
+    diff.components = _compare({c.name: c for c in old.components}, {c.name: c for c in new.components})
+    diff.effects = _compare({e.name: e for e in old.effects}, {e.name: e for e in new.effects})
+
+    old_f, old_s, old_i, old_w = _members(old)
+    new_f, new_s, new_i, new_w = _members(new)
+    diff.functions = _compare(old_f, new_f)
+    diff.states = _compare(old_s, new_s)
+    diff.invariants = _compare(old_i, new_i)
+    diff.workflows = _compare(old_w, new_w)
+    return diff
@@ -0,0 +1,58 @@
+import re
+from typing import Dict, List, Set, Tuple, Any
+
+# Matches 'perform Effect.operation' in function bodies and workflow steps
+PERFORM_PATTERN = re.compile(r"\bperform\s+([A-Za-z_]\w*)\.([A-Za-z_]\w*)")
+
+class SpecIndex:
+    """
+    Name -> AST node lookup tables for one SystemSpec.
+    Qualified keys use 'Owner.member'; system-level workflows use their bare name.
+    """
+    def __init__(self, spec):
+        self.components: Dict[str, Any] = {}
+        self.functions: Dict[str, Any] = {}
+        self.functions_by_name: Dict[str, List[Tuple[Any, Any]]] = {}
+        self.effects: Dict[str, Any] = {}
+        self.operations: Dict[str, Any] = {}
+        self.workflows: Dict[str, Any] = {}
+        self.performers: Dict[str, List[Any]] = {} # effect name -> components performing it
+        self._shape = None
+
+        for effect in spec.effects:
+            self.add_effect(effect)
+        for workflow in spec.workflows:
+            self.workflows[workflow.name] = workflow
+        for comp in spec.components:
+            self.add_component(comp)
+        self._shape = self.shape_of(spec)
+
+    @staticmethod
+    def shape_of(spec) -> Tuple[int, int, int]:
+        # Cheap staleness check for specs mutated after indexing
+        return (len(spec.components), len(spec.effects), len(spec.workflows))
+
+    def is_stale(self, spec) -> bool:
+        return self._shape != self.shape_of(spec)
+
+    def add_effect(self, effect):
+        self.effects[effect.name] = effect
+        for op in effect.operations:
+            self.operations[f"{effect.name}.{op.name}"] = op
+
+    def add_component(self, comp):
+        self.components[comp.name] = comp
+        for func in comp.functions:
+            self.functions[f"{comp.name}.{func.name}"] = func
+            self.functions_by_name.setdefault(func.name, []).append((comp, func))
+        for workflow in comp.workflows:
+            self.workflows[f"{comp.name}.{workflow.name}"] = workflow
+        for effect_name in sorted(self._performed_effects(comp)):
+            self.performers.setdefault(effect_name, []).append(comp)
+
+    @staticmethod
+    def _performed_effects(comp) -> Set[str]:
+        texts = [f.body for f in comp.functions if f.body]
+        for workflow in comp.workflows:
+            texts.extend(workflow.steps)
+        return {m.group(1) for text in texts for m in PERFORM_PATTERN.finditer(text)}
@@ -0,0 +1,159 @@
+"""
+Parsing half of the spec compiler: the LALR parser for AISPEC_GRAMMAR and the
+transformer from parse trees to AST nodes. Kept apart from kernel.compiler so that
+specs served from the SpecCache never import the parser (standalone or lark).
+"""
+import os
+from .compiler import (AISPEC_GRAMMAR, GRAMMAR_VERSION, SystemSpec, ComponentSpec, StateSpec, FunctionSpec,
+                       EffectSpec, WorkflowSpec, TypeRef, type_ref, field_ref, param_tuple)
+
+# Prefer the pre-generated standalone parser (see kernel/build_parser.py): it needs
+# neither the lark package nor LALR table construction at startup. It is only
+# trusted if it was generated from the exact grammar text in kernel.compiler.
+# Set SPAK_DYNAMIC_PARSER=1 to force the Lark path (e.g. for benchmarks).
+try:
+    from . import _aispec_parser as _standalone
+    if (getattr(_standalone, "GRAMMAR_VERSION", None) != GRAMMAR_VERSION
+            or os.environ.get("SPAK_DYNAMIC_PARSER")):
+        _standalone = None
+except ImportError:
+    _standalone = None
+
+if _standalone is not None:
+    from ._aispec_parser import Transformer
+else:
+    from lark import Transformer
+
+# --- Transformer ---
+
+class AISpecTransformer(Transformer):
+    def start(self, items):
+        system = items[-1]
+        if len(items) > 1 and isinstance(items[0], dict):
+            system.metadata = items[0]
+        return system
+
+    def meta_def(self, items):
+        return {k: v for k, v in items}
+
+    def meta_field(self, items):
+        return (items[0].value, items[1].value.strip('"'))
+
+    def system_def(self, items):
+        name = items[0].value
+        components = [i for i in items[1:] if isinstance(i, ComponentSpec)]
+        effects = [i for i in items[1:] if isinstance(i, EffectSpec)]
+        workflows = [i for i in items[1:] if isinstance(i, WorkflowSpec)]
+        imports = [i for i in items[1:] if isinstance(i, str)]
+        return SystemSpec(name=name, components=components, effects=effects, workflows=workflows, imports=imports)
+
+    def component_block(self, items):
+        name = items[0].value
+        spec = ComponentSpec(name=name)
+        for item in items[1:]:
+            if isinstance(item, tuple) and item[0] == 'desc':
+                spec.description = item[1]
+            elif isinstance(item, StateSpec):
+                spec.states.append(item)
+            elif isinstance(item, FunctionSpec):
+                spec.functions.append(item)
+            elif isinstance(item, WorkflowSpec):
+                spec.workflows.append(item)
+            elif isinstance(item, tuple) and item[0] == 'invariant':
+                spec.invariants.append(item[1])
+            elif isinstance(item, tuple) and item[0] == 'constraint':
+                spec.constraints.append(item[1])
+        return spec
+    
+    def component_decl(self, items):
+        return ComponentSpec(name=items[0].value)
+
+    def effect_block(self, items):
+        name = items[0].value
+        ops = [i for i in items[1:] if isinstance(i, FunctionSpec)]
+        return EffectSpec(name=name, operations=ops)
+
+    def workflow_def(self, items):
+        name = items[0].value
+        params = items[1]
+        raw_steps = [i for i in items[2:] if isinstance(i, tuple) and i[0] == 'step']
+        steps = [f"Step {step_name}: {body.strip()}" for _, step_name, body in raw_steps] # Simplified steps
+        sources = tuple((step_name, body) for _, step_name, body in raw_steps)
+        return WorkflowSpec(name=name, params=params, steps=steps, sources=sources)
+
+    def import_stmt(self, items):
+        return items[0].value
+
+    def description(self, items):
+        return ('desc', items[0].value.strip('"'))
+
+    def state_def(self, items):
+        name = items[0].value
+        fields = items[1]
+        return StateSpec(name=name, fields=fields)
+
+    def function_def(self, items):
+        name = items[0].value
+        params = items[1] or ()
+        ret_type = items[2]
+        return FunctionSpec(name=name, params=params, return_type=ret_type)
+
+    def function_def_body(self, items):
+        name = items[0].value
+        params = items[1] or ()
+        ret_type = items[2]
+        body = items[3]
+        return FunctionSpec(name=name, params=params, return_type=ret_type, body=body)
+
+    def func_body(self, items):
+        return items[0].value.strip()
+
+    def effect_op(self, items):
+        # Maps operation to FunctionSpec for simplicity
+        name = items[0].value
+        params = items[1] or ()
+        ret_type = items[2]
+        return FunctionSpec(name=name, params=params, return_type=ret_type)
+
+    def workflow_step(self, items):
+        return ('step', items[0].value, items[1].value)
+
+    def invariant(self, items):
+        return ('invariant', items[0].value.strip())
+
+    def constraint(self, items):
+        return ('constraint', items[0].value.strip())
+
+    def field_list(self, items):
+        return param_tuple(items)
+
+    def param_list(self, items):
+        return param_tuple(items)
+
+    def field_decl(self, items):
+        return field_ref(items[0].value, items[1])
+
+    def type_simple(self, items):
+        return type_ref(items[0].value)
+
+    def type_list(self, items):
+        return type_ref("List", items[0])
+
+    def type_map(self, items):
+        return type_ref("Map", items[0])
+
+    def type_result(self, items):
+        return type_ref("Result", items[0])
+
+    def generic_args(self, items):
+        return tuple(i for i in items if isinstance(i, TypeRef))
+    
+    def logic_expr(self, items):
+        return items[0]
+
+def make_parser():
+    """The standalone parser if it is current, else one built by Lark from the grammar."""
+    if _standalone is not None:
+        return _standalone.Lark_StandAlone()
+    from lark import Lark
+    return Lark(AISPEC_GRAMMAR, start='start', parser='lalr')
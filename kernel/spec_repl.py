@@ -1,11 +1,43 @@
 import cmd
 import os
 import sys
-import code
+import time
+import contextlib
 import importlib.util
 from .compiler import Compiler
-from .verifier import Verifier
-from .builder import Builder
+from .cache import SpecCache, LLMCache, ResultCache
+from .linker import Linker, LinkError
+from . import console
+
+# Directories with at least this many specs are parsed on a process pool by default.
+PARALLEL_LOAD_THRESHOLD = 32
+
+_worker_compiler = None
+
+def _compile_in_worker(path):
+    """Process-pool entry point. Returns (path, spec, error, cpu_seconds)."""
+    global _worker_compiler
+    if _worker_compiler is None:
+        _worker_compiler = Compiler(cache=SpecCache())
+    # CPU time, not wall time: workers sharing a core must not inflate the speedup
+    start = time.process_time()
+    try:
+        spec = _worker_compiler.compile_file(path)
+        return path, spec, None, time.process_time() - start
+    except Exception as e:
+        return path, None, str(e), time.process_time() - start
+
+def _pop_count(args, flag="-j"):
+    """Removes 'FLAG N' (N >= 1) from a command's argument list. Returns (N or None, remaining args)."""
+    if flag not in args:
+        return None, args
+    idx = args.index(flag)
+    if idx + 1 >= len(args):
+        raise ValueError(f"{flag} needs a value")
+    count = int(args[idx + 1])
+    if count < 1:
+        raise ValueError(f"invalid {flag} value {count}")
+    return count, args[:idx] + args[idx + 2:]
 
 class SpecREPL(cmd.Cmd):
     intro = 'Welcome to the Spec-Driven Build Agent Shell. Type help or ? to list commands.\n'
@@ -13,35 +45,77 @@ class SpecREPL(cmd.Cmd):
 
     def __init__(self):
         super().__init__()
-        self.compiler = Compiler()
-        self.verifier = Verifier()
-        self.builder = Builder()
+        self.compiler = Compiler(cache=SpecCache())
+        self.linker = Linker(self.compiler)
+        # Verification and LLM machinery is imported and set up on first use, keeping startup fast
+        self._verifier = None
+        self._builder = None
+        self._context = None
         self.current_specs = {}  # {name: spec}
         self.current_spec = None # active spec
+        self.spec_paths = {}     # {name: source path}, for incremental reloads
+        self.last_diff = None    # SpecDiff from the most recent reload; scopes build and verify until the next load
+
+    @property
+    def verifier(self):
+        if self._verifier is None:
+            from .verifier import Verifier
+            self._verifier = Verifier(results=ResultCache())
+        return self._verifier
+
+    @property
+    def builder(self):
+        if self._builder is None:
+            from .builder import Builder
+            self._builder = Builder(cache=LLMCache())
+        return self._builder
+
+    @property
+    def context(self):
+        if self._context is None:
+            from .context import ContextAssembler
+            self._context = ContextAssembler(model=self.builder.model_name)
+        return self._context
 
     def emptyline(self):
         pass
 
     def do_load(self, arg):
-        """Load spec file(s). Usage: load specs/SPEC.root.md OR load specs"""
+        """Load spec file(s). Usage: load specs/SPEC.root.md OR load specs [-j N]"""
+        try:
+            jobs, args = _pop_count(arg.split())
+        except ValueError:
+            print("Usage: load <dir> -j N")
+            return
+        arg = " ".join(args)
+
         if not arg:
             print("Please provide a file or directory path.")
             return
+        self.last_diff = None
         
         if not os.path.exists(arg):
             print(f"Path not found: {arg}")
             return
 
         if os.path.isdir(arg):
-            count = 0
+            paths = []
             for root, _, files in os.walk(arg):
                 for file in files:
                     if file.endswith(".md") and file.startswith("SPEC"):
-                        path = os.path.join(root, file)
-                        self._load_single_file(path)
-                        count += 1
-            if count == 0:
+                        paths.append(os.path.join(root, file))
+            paths.sort() # Deterministic merge order regardless of filesystem walk order
+
+            if jobs is None:
+                jobs = (os.cpu_count() or 1) if len(paths) >= PARALLEL_LOAD_THRESHOLD else 1
+            if jobs > 1 and len(paths) > 1:
+                count = self._load_parallel(paths, jobs)
+            else:
+                count = sum(self._load_single_file(path) for path in paths)
+            if not paths:
                 print(f"No SPEC files found in {arg}")
+            elif count == 0:
+                print(f"❌ None of the {len(paths)} SPEC files in {arg} could be loaded (errors above)")
             else:
                 print(f"Loaded {count} specs from {arg}")
                 if self.current_specs:
@@ -54,14 +128,128 @@ class SpecREPL(cmd.Cmd):
         else:
             self._load_single_file(arg)
 
-    def _load_single_file(self, path):
+    def _load_parallel(self, paths, jobs):
+        """Parses specs on a process pool and merges them in path order. Returns the number of specs loaded."""
+        from concurrent.futures import ProcessPoolExecutor
+        jobs = min(jobs, len(paths))
+        print(f"⚡ Parsing {len(paths)} specs on {jobs} processes...")
+        start = time.perf_counter()
+        try:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(_compile_in_worker, paths, chunksize=max(1, len(paths) // (jobs * 4))))
+        except Exception as e:
+            print(f"⚠️  Parallel load failed ({e}). Falling back to sequential load.")
+            return sum(self._load_single_file(path) for path in paths)
+        wall = time.perf_counter() - start
+
+        # Register every module first so imports between loaded specs never re-parse
+        for path, spec, error, _ in results:
+            if error is None:
+                self.linker.remember(path, spec)
+
+        serial_time = 0.0
+        failed = 0
+        for path, spec, error, elapsed in results:
+            serial_time += elapsed
+            if error is not None:
+                failed += 1
+                print(f"Error parsing {path}: {error}")
+                continue
+            try:
+                spec = self.linker.link(spec, os.path.dirname(path))
+            except LinkError as e:
+                failed += 1
+                print(f"Error linking {path}: {e}")
+                continue
+            self.current_specs[spec.name] = spec
+            self.spec_paths[spec.name] = path
+            self.current_spec = spec
+            print(f"Successfully loaded System: '{spec.name}' from {path}")
+
+        speedup = serial_time / wall if wall > 0 else 0.0
+        print(f"⏱️  Parsed in {wall:.2f}s (sequential CPU time {serial_time:.2f}s, speedup {speedup:.1f}x, {failed} failed)")
+        return len(paths) - failed
+
+    def _load_single_file(self, path) -> bool:
+        """Loads and links one spec file, printing the error if it fails. Returns True on success."""
         try:
-            spec = self.compiler.compile_file(path)
+            spec = self.linker.load(path) # Shares the module table with import resolution
+            spec = self.linker.link(spec, os.path.dirname(path))
             self.current_specs[spec.name] = spec
+            self.spec_paths[spec.name] = path
             self.current_spec = spec
             print(f"Successfully loaded System: '{spec.name}' from {path}")
+            return True
+        except LinkError as e:
+            print(f"Error linking {path}: {e}")
         except Exception as e:
             print(f"Error parsing {path}: {e}")
+        return False
+
+    def do_reload(self, arg):
+        """Re-parse a loaded spec from disk and show what changed. Usage: reload [SystemName]"""
+        name = arg.strip() or (self.current_spec.name if self.current_spec else None)
+        if not name or name not in self.spec_paths:
+            print(f"System '{name}' was not loaded from a file. Loaded: {list(self.spec_paths.keys())}")
+            return
+
+        path = self.spec_paths[name]
+        previous = self.current_specs.get(name)
+        try:
+            spec, diff = self.compiler.compile_incremental(
+                path, previous, link=lambda raw: self.linker.link(raw, os.path.dirname(path)))
+        except Exception as e:
+            print(f"Error parsing {path}: {e}")
+            return
+
+        if spec.name != name:
+            # The system was renamed in place; keep the old entry from shadowing it
+            del self.current_specs[name]
+            del self.spec_paths[name]
+        self.current_specs[spec.name] = spec
+        self.spec_paths[spec.name] = path
+        if self.current_spec is previous:
+            self.current_spec = spec
+        self.last_diff = diff
+
+        if diff.is_empty():
+            print(f"✨ '{spec.name}' is unchanged.")
+            return
+        print(f"🔄 Reloaded '{spec.name}' from {path}:")
+        for line in diff.summary():
+            print(f"   {line}")
+        affected = sorted(diff.affected_components())
+        if affected:
+            print(f"👉 Affected components: {', '.join(affected)} ('build' and 'verify' now cover only these)")
+
+    def _affected(self, args):
+        """
+        Names of the active system's components changed by the last reload, or None
+        for all of them. '--all' in args (removed from it) also selects all.
+        """
+        if "--all" in args:
+            args.remove("--all")
+            return None
+        diff = self.last_diff
+        if diff is None or diff.system != self.current_spec.name:
+            return None
+        return diff.affected_components() or None
+
+    def do_deps(self, arg):
+        """Show the import graph of a loaded system. Usage: deps [SystemName]"""
+        name = arg.strip() or (self.current_spec.name if self.current_spec else None)
+        if name not in self.spec_paths:
+            print(f"System '{name}' was not loaded from a file.")
+            return
+        path = self.spec_paths[name]
+        try:
+            graph = self.linker.dependency_graph(self.linker.load(path), os.path.dirname(path))
+        except LinkError as e:
+            print(f"❌ {e}")
+            return
+        for system, imports in graph.items():
+            print(f"{system} -> {', '.join(imports) if imports else '(no imports)'}")
+        print(f"📦 {len(graph) - 1} imported module(s); {self.linker.compiles} spec file(s) compiled this session")
 
     def do_list(self, arg):
         """List loaded specs."""
@@ -104,97 +292,244 @@ class SpecREPL(cmd.Cmd):
             print(f"System '{arg}' not found. Loaded: {list(self.current_specs.keys())}")
 
     def do_verify(self, arg):
-        """Verify the implementation against the loaded spec. Usage: verify [src_dir]"""
+        """Verify the implementation against the loaded spec. After a reload, only the affected components' tests run unless --all is given.
+        Usage: verify [src_dir] [-j N] [--force] [--record|--replay] [--all]"""
         if not self.current_spec:
             print("No active spec.")
             return
 
-        src_dir = arg if arg else "src"
+        try:
+            jobs, args = _pop_count(arg.split())
+        except ValueError:
+            print("Usage: verify [src_dir] [-j N] [--force] [--record|--replay] [--all]")
+            return
+        affected = self._affected(args)
+        force = "--force" in args # Re-run tests that passed unchanged before
+        # Record LLM effects to tests/cassettes, or serve them from there (default: SPAK_CASSETTE)
+        cassette = "record" if "--record" in args else "replay" if "--replay" in args else None
+        args = [a for a in args if a not in ("--force", "--record", "--replay")]
+        src_dir = args[0] if args else "src"
         if not os.path.exists(src_dir):
             os.makedirs(src_dir, exist_ok=True)
 
         print(f"Verifying '{self.current_spec.name}' against '{src_dir}'...")
-        self.verifier.verify_spec(self.current_spec, src_dir)
+        if affected:
+            print(f"🔄 Testing only the components changed by the last reload: {', '.join(sorted(affected))}")
+        dynamic = self.verifier.dynamic
+        default_cassette = dynamic.cassette
+        dynamic.force = force
+        dynamic.cassette = cassette or default_cassette
+        try:
+            self.verifier.verify_spec(self.current_spec, src_dir, jobs or 1, components=affected)
+        finally:
+            dynamic.force = False
+            dynamic.cassette = default_cassette
     
+    def _without_cache(self, arg, command):
+        """Runs command(arg) with '--no-cache' stripped from arg, bypassing the LLM cache if it was given."""
+        args = arg.split()
+        bypass = "--no-cache" in args
+        self.builder.use_cache = not bypass
+        try:
+            command(" ".join(a for a in args if a != "--no-cache"))
+        finally:
+            self.builder.use_cache = True
+
     def do_build(self, arg):
-        """Auto-implement missing components AND generate tests using TDD flow. Usage: build [src_dir]"""
+        """Auto-implement missing components AND generate tests using TDD flow. After a reload, the affected components are regenerated
+        (tests and code) and the rest are left alone unless --all is given. Usage: build [src_dir] [-j N] [--best-of N] [--no-cache] [--all]"""
+        self._without_cache(arg, self._build)
+
+    def _build(self, arg):
         if not self.current_spec:
             print("No active spec.")
             return
-        
-        src_dir = arg if arg else "src"
+
+        try:
+            jobs, args = _pop_count(arg.split())
+            best_of, args = _pop_count(args, "--best-of")
+        except ValueError:
+            print("Usage: build [src_dir] [-j N] [--best-of N] [--no-cache] [--all]")
+            return
+        affected = self._affected(args)
+        src_dir = args[0] if args else "src"
         test_dir = "tests"
         if not os.path.exists(src_dir): os.makedirs(src_dir, exist_ok=True)
         if not os.path.exists(test_dir): os.makedirs(test_dir, exist_ok=True)
 
         print(f"🚀 [Kernel] Starting Spec-Driven TDD Build Process...")
 
-        print(f"📋 [Kernel] Phase 1: Test Generation")
-        test_contents = {}
-
-        for comp in self.current_spec.components:
-            test_file = os.path.join(test_dir, f"tests.{comp.name.lower()}.yaml")
-            
-            if not os.path.exists(test_file):
-                print(f"  generating tests for {comp.name}...")
-                yaml_content = self.builder.generate_tests(comp, self.current_spec.name)
-                with open(test_file, "w", encoding="utf-8") as f:
-                    f.write(yaml_content)
-                print(f"  ✅ Created {test_file}")
-                test_contents[comp.name] = yaml_content
-            else:
-                print(f"  ℹ️  Using existing tests for {comp.name}")
-                with open(test_file, "r", encoding="utf-8") as f:
-                    test_contents[comp.name] = f.read()
+        # Implementation state does not depend on test generation, so every component
+        # can run its whole pipeline (tests, then implementation) independently.
+        self.verifier.static.verify(self.current_spec, src_dir)
+        missing = set(self.verifier.static.missing_components)
+        components = self.current_spec.components
+        if affected:
+            # Regenerate only what the last reload changed, existing files included
+            components = [c for c in components if c.name in affected]
+            missing = set(affected)
+            print(f"🔄 [Kernel] Rebuilding the components changed by the last reload: {', '.join(sorted(affected))}")
+        jobs = min(jobs or 1, len(components)) or 1
+
+        start = time.perf_counter()
+        failures = {}
+        stale = missing if affected else set()
+        stale -= self._generate_tests_batch(components, test_dir, stale)
+        verify_pool = None
+        if best_of and best_of > 1 and missing:
+            # Candidates are verified in worker processes, isolated from the REPL and each other
+            from concurrent.futures import ProcessPoolExecutor
+            verify_pool = ProcessPoolExecutor(max_workers=min(best_of * len(missing), os.cpu_count() or 1))
+            print(f"🎲 [Kernel] Speculative synthesis: best of {best_of} candidates per component")
+        build = lambda comp, concurrent=False: self._build_component(
+            comp, comp.name in missing, src_dir, test_dir, concurrent, best_of or 1, verify_pool,
+            regenerate_tests=comp.name in stale)
+        try:
+            self._build_all(components, jobs, build, failures)
+        finally:
+            if verify_pool is not None:
+                verify_pool.shutdown(wait=False, cancel_futures=True)
 
-        print(f"\n🏗️ [Kernel] Phase 2: Implementation (Test-Guided)")
-        
-        errors = self.verifier.static.verify(self.current_spec, src_dir)
-        missing_components = []
-        for err in errors:
-            if "Missing implementation for Component" in err:
-                comp_name = err.split("'")[1]
-                comp_ast = next((c for c in self.current_spec.components if c.name == comp_name), None)
-                if comp_ast:
-                    missing_components.append(comp_ast)
-        
-        if not missing_components:
+        if not missing:
             print("✨ All components are already implemented. (Run 'repair' if logic is broken)")
-            return
-
-        for comp in missing_components:
-            test_context = ""
-            if comp.name in test_contents:
-                test_context = f"\nCRITICAL: The implementation MUST pass the following tests:\n\n{test_contents[comp.name]}"
-            
-            code = self.builder.implement_component(comp, test_context)
-            
-            file_name = f"{comp.name.lower()}.py"
-            file_path = os.path.join(src_dir, file_name)
-            
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(code)
-            
-            print(f"✅ Synthesized {file_name} (Aligned with tests)")
+        if failures:
+            print(f"\n❌ [Kernel] {len(failures)} component(s) failed:")
+            for name, error in failures.items():
+                print(f"   {name}: {error}")
+        if verify_pool is not None:
+            self._print_speculative_stats(best_of)
+        self._print_llm_stats()
+        print(f"\n🏁 [Kernel] TDD Build complete in {time.perf_counter() - start:.1f}s. Run 'verify' to confirm.")
+
+    def _build_all(self, components, jobs, build, failures):
+        if jobs == 1:
+            for comp in components:
+                error = build(comp)
+                if error:
+                    failures[comp.name] = error
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            backend = self.builder.backend_of(self.builder.model_name)
+            print(f"⚡ [Kernel] Building {len(components)} components on {jobs} threads "
+                  f"(at most {self.builder.concurrency(backend)} concurrent '{backend}' requests)")
+            with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="build") as pool:
+                futures = [(comp, pool.submit(build, comp, True)) for comp in components]
+                for comp, future in futures:
+                    error = future.result()
+                    if error:
+                        failures[comp.name] = error
+
+    def _generate_tests_batch(self, components, test_dir, stale=()):
+        """Writes tests for all components lacking a test file, or named in `stale`, with one LLM call.
+        Components whose slice fails validation are left for the per-component pipeline.
+        Returns the names of the components whose tests were written."""
+        needed = [c for c in components
+                  if c.name in stale or not os.path.exists(os.path.join(test_dir, f"tests.{c.name.lower()}.yaml"))]
+        if len(needed) < 2:
+            return set()
+        print(f"📋 [Kernel] Batched test generation for {len(needed)} components")
+        files, failed = self.builder.generate_tests_batch(needed, self.current_spec.name)
+        for name, content in files.items():
+            test_file = os.path.join(test_dir, f"tests.{name.lower()}.yaml")
+            with open(test_file, "w", encoding="utf-8") as f:
+                f.write(content)
+            print(f"  ✅ Created {test_file}")
+        for name, reason in failed.items():
+            print(f"  ↩️  {name}: {reason}; falling back to a separate call")
+        return set(files)
+
+    def _print_speculative_stats(self, n):
+        from .speculative import pass_rates
+        stats = pass_rates().get((self.builder.model_name, n))
+        if stats:
+            ttfp = stats["mean_time_to_first_pass_s"]
+            print(f"📈 [Kernel] {self.builder.model_name} best-of-{n}: pass@{n} {stats['pass_at_n']:.0%}, "
+                  f"candidate pass rate {stats['candidate_pass_rate']:.0%} over {stats['runs']} run(s)"
+                  + (f", mean time to first pass {ttfp:.1f}s" if ttfp is not None else ""))
+
+    def _build_component(self, comp, implement: bool, src_dir: str, test_dir: str, concurrent: bool = False,
+                         best_of: int = 1, verify_pool=None, regenerate_tests: bool = False):
+        """
+        Generates tests (if absent, or always with `regenerate_tests`) and, when `implement` is set,
+        the implementation of one component.
+        With best_of > 1, samples that many implementations and keeps the first that passes its tests.
+        If test generation fails, the component is still implemented, from a single sample and unverified.
+        Returns an error message instead of raising, so one failing component never stops the others.
+        """
+        with console.prefixed(comp.name) if concurrent else contextlib.nullcontext():
+            try:
+                test_file = os.path.join(test_dir, f"tests.{comp.name.lower()}.yaml")
+                test_error = None
+                if regenerate_tests or not os.path.exists(test_file):
+                    console.say(f"  generating tests for {comp.name}...")
+                    test_content = self.builder.generate_tests(comp, self.current_spec.name)
+                    if test_content.startswith("# Error"):
+                        # Still implement the component, just without tests to guide or check it
+                        test_error = test_content.splitlines()[0][2:]
+                        console.say(f"⚠️ Test generation failed for {comp.name} ({test_error})"
+                                    + ("; implementing without tests" if implement else ""))
+                        test_content = None
+                    else:
+                        with open(test_file, "w", encoding="utf-8") as f:
+                            f.write(test_content)
+                        console.say(f"  ✅ Created {test_file}")
+                else:
+                    console.say(f"  ℹ️  Using existing tests for {comp.name}")
+                    with open(test_file, "r", encoding="utf-8") as f:
+                        test_content = f.read()
+
+                if not implement:
+                    return test_error
+                test_context = self.context.for_synthesis(comp, test_content).text if test_content is not None else ""
+                if best_of > 1 and verify_pool is not None and test_content is not None:
+                    from .speculative import synthesize
+                    result = synthesize(self.builder, comp, test_context, test_file, best_of, verify_pool)
+                    if result.candidates:
+                        result.record()
+                        outcome = (f"candidate #{result.winner} passed after {result.time_to_first_pass_s:.1f}s"
+                                   if result.passed else "no candidate passed; keeping the one with fewest errors")
+                        console.say(f"🎲 {comp.name}: {outcome} ({result.pass_rate:.0%} of verified candidates passed)")
+                    code = result.code
+                else:
+                    code = self.builder.implement_component(comp, test_context)
+                if code.startswith("# Error"):
+                    console.say(f"❌ Synthesis failed for {comp.name}")
+                    return code.splitlines()[0][2:]
 
-        print("\n🏁 [Kernel] TDD Build complete. Run 'verify' to confirm.")
+                file_name = f"{comp.name.lower()}.py"
+                with open(os.path.join(src_dir, file_name), "w", encoding="utf-8") as f:
+                    f.write(code)
+                console.say(f"✅ Synthesized {file_name} " + ("(Aligned with tests)" if test_content is not None else "(no tests)"))
+                return None
+            except Exception as e:
+                console.say(f"❌ Build failed for {comp.name}: {e}")
+                return str(e)
 
     def do_repair(self, arg):
-        """Attempt to repair implementation OR tests based on verification errors. Usage: repair [src_dir]"""
+        """Attempt to repair implementation OR tests based on verification errors. Usage: repair [src_dir] [--full] [--no-cache]"""
+        self._without_cache(arg, self._repair)
+
+    def _repair(self, arg):
+        from .context import group_errors
         if not self.current_spec:
             print("No active spec.")
             return
 
-        src_dir = arg if arg else "src"
+        args = arg.split()
+        full = "--full" in args # Regenerate whole files instead of patching
+        args = [a for a in args if a != "--full"]
+        src_dir = args[0] if args else "src"
         test_dir = "tests"
         
         print(f"🔧 [Kernel] Running diagnosis on '{self.current_spec.name}'...")
         
         dynamic_errors = []
+        tested = {} # Test file -> component name
         # Iterate over components to find errors
         for comp in self.current_spec.components:
             test_file = os.path.join(test_dir, f"tests.{comp.name.lower()}.yaml")
             if os.path.exists(test_file):
+                tested[test_file] = comp.name
                 errs = self.verifier.verify_behavior(test_file, src_dir)
                 for e in errs:
                     # Tag error with test file for context
@@ -233,12 +568,19 @@ class SpecREPL(cmd.Cmd):
                     path = err.split("]")[0].strip("[")
                     involved_test_files.add(path)
             
+            errors_by_file = group_errors(dynamic_errors)
             for test_file in involved_test_files:
                 print(f"🚑 [Kernel] Repairing Test File '{test_file}'...")
                 with open(test_file, 'r', encoding='utf-8') as f:
                     broken_yaml = f.read()
                 
-                fixed_yaml = self.builder.fix_tests(broken_yaml, error_log)
+                # Only this file's errors; the YAML itself is what gets repaired
+                file_errors = list(dict.fromkeys(errors_by_file.get(test_file, [])))
+                comp = self.current_spec.component(tested.get(test_file))
+                fixed_yaml = self.builder.fix_tests(broken_yaml, "\n".join(file_errors), full=full, spec=comp)
+                if fixed_yaml == broken_yaml:
+                    print(f"⚠️ [Kernel] No valid repair for '{test_file}'; tests left unchanged.")
+                    continue
                 
                 with open(test_file, 'w', encoding='utf-8') as f:
                     f.write(fixed_yaml)
@@ -247,47 +589,103 @@ class SpecREPL(cmd.Cmd):
         else:
             print("🧐 [Kernel] Diagnosis: The IMPLEMENTATION seems to have logic errors.")
             
-            # Similar logic for implementation files
+            # Only components whose tests failed are repaired, each with its own errors
+            errors_by_file = group_errors(dynamic_errors)
             for comp in self.current_spec.components:
                 test_file = os.path.join(test_dir, f"tests.{comp.name.lower()}.yaml")
-                test_context = ""
+                comp_errors = errors_by_file.get(test_file)
+                if not comp_errors:
+                    continue
+                test_yaml = None
                 if os.path.exists(test_file):
                     with open(test_file, 'r', encoding='utf-8') as f:
-                        test_context = f"\n\nRELATED TEST FILE ({test_file}):\n{f.read()}"
+                        test_yaml = f.read()
 
                 file_name = f"{comp.name.lower()}.py"
                 file_path = os.path.join(src_dir, file_name)
                 
                 if os.path.exists(file_path):
-                    # Only repair if errors seem related to this component? 
-                    # For now, simplistic approach: repair all if generic errors.
                     print(f"🚑 [Kernel] Repairing Implementation '{file_path}'...")
                     with open(file_path, 'r', encoding='utf-8') as f:
                         broken_code = f.read()
                     
-                    full_context = error_log + test_context
-                    fixed_code = self.builder.fix_implementation(broken_code, full_context)
+                    full_context = self.context.for_repair(comp, comp_errors, test_yaml, baseline_errors=dynamic_errors).text
+                    fixed_code = self.builder.fix_implementation(broken_code, full_context, full=full)
                     
                     with open(file_path, 'w', encoding='utf-8') as f:
                         f.write(fixed_code)
                     print(f"✅ [Kernel] Applied fix to implementation.")
 
+        self._print_llm_stats()
         print("\n🏁 [Kernel] Repair sequence complete. Run 'verify' to check if it worked.")
 
+    def _print_llm_stats(self):
+        if self.context.calls:
+            print(f"✂️  [Kernel] Context pruning saved {self.context.tokens_saved} prompt tokens over {self.context.calls} call(s)")
+            self.context.tokens_saved = self.context.calls = 0
+        cache = self.builder.cache
+        if cache is not None and (cache.hits or cache.misses):
+            print(f"💾 [Kernel] LLM cache: {cache.hits} hit(s), {cache.misses} miss(es)")
+
+    def do_stats(self, arg):
+        """Show LLM latency and token metrics per model and call type. Usage: stats [export <path>]"""
+        telemetry = self.builder.telemetry
+        args = arg.split()
+        if args and args[0] == "export":
+            if len(args) != 2:
+                print("Usage: stats export <path>")
+                return
+            try:
+                telemetry.export(args[1])
+            except OSError as e:
+                print(f"❌ Could not export LLM metrics: {e}")
+                return
+            print(f"📤 Exported LLM metrics to {args[1]}")
+            return
+
+        rows = telemetry.summary()
+        if not rows:
+            print("No LLM calls recorded yet.")
+            return
+        fmt = lambda v, spec: format(v, spec) if v is not None else "-"
+        print(f"\n📊 LLM call metrics (this session):\n")
+        print(f"  {'model':<28} {'kind':<20} {'calls':>5} {'cached':>6} {'failed':>6} {'prompt tok':>10} "
+              f"{'out tok':>8} {'TTFT s':>7} {'p95':>6} {'tok/s':>7} {'wall s':>7}")
+        for row in rows:
+            print(f"  {row['model'][:28]:<28} {row['kind'][:20]:<20} {row['calls']:>5} {row['cached']:>6} {row['failed']:>6} "
+                  f"{fmt(row['mean_prompt_tokens'], '.0f'):>10} {row['completion_tokens']:>8} "
+                  f"{fmt(row['mean_ttft_s'], '.2f'):>7} {fmt(row['p95_ttft_s'], '.2f'):>6} "
+                  f"{fmt(row['mean_tokens_per_s'], '.1f'):>7} {fmt(row['mean_wall_s'], '.1f'):>7}")
+        print("\n  prompt tok = mean per call; TTFT, tok/s and wall are means over uncached calls.")
+
+    def do_cache(self, arg):
+        """Show or clear the LLM response cache. Usage: cache [clear]"""
+        cache = self.builder.cache
+        if cache is None:
+            print("LLM cache is disabled.")
+            return
+        if arg.strip() == "clear":
+            cache.clear()
+            print(f"🧹 Cleared LLM cache at {cache.cache_dir}")
+            return
+        stats = cache.stats()
+        print(f"💾 LLM cache: {cache.cache_dir}")
+        for key, value in stats.items():
+            print(f"  {key}: {value}")
+
     def do_history(self, arg):
-        """Show LLM conversation history. Usage: history [last_n]"""
-        history = self.builder.get_history()
-        if not history:
+        """Show this session's LLM conversation history: the last 10 interactions, the last N, or all. Usage: history [N|all]"""
+        total = len(self.builder.history) if self.builder.history is not None else 0
+        if not total:
             print("No LLM interactions yet.")
             return
         
-        limit = len(history)
-        if arg.isdigit():
-            limit = int(arg)
+        limit = total if arg.strip() == "all" else int(arg) if arg.strip().isdigit() else 10
+        history = self.builder.get_history(limit) # Reads only the entries shown
         
-        print(f"\n📜 Showing last {limit} interactions:\n")
-        for i, item in enumerate(history[-limit:]):
-            print(f"--- [{i+1}] Type: {item['type']} ---")
+        print(f"\n📜 Showing last {len(history)} of {total} interactions ({self.builder.history.path}):\n")
+        for i, item in enumerate(history, start=total - len(history) + 1):
+            print(f"--- [{i}] Type: {item['type']} ---")
             if 'component' in item:
                 print(f"Component: {item['component']}")
             print(f"[PROMPT]:\n{item['prompt'][:200]}... (truncated)\n")
@@ -356,6 +754,7 @@ class SpecREPL(cmd.Cmd):
             vars['app'] = instance
             
             # Start interaction
+            import code
             code.interact(local=vars)
             
             # Cleanup
@@ -365,6 +764,53 @@ class SpecREPL(cmd.Cmd):
             print(f"Error running component: {e}")
             semantic_kernel._active_runtime = None
 
+    def do_flow(self, arg):
+        """Run a spec workflow directly from its compiled IR (no synthesis). Usage: flow [Component.]Workflow [args...]"""
+        from .handlers import (LiteLLMHandler, SafeREPLHandler, FileSystemHandler, MathHandler,
+                               UserInteractionHandler, MessageBusHandler, RecursiveAgentHandler)
+        from .runtime import Runtime
+        from .workflow_ir import WorkflowAgent, WorkflowCompileError
+
+        if not self.current_spec:
+            print("No active spec.")
+            return
+
+        args = arg.split()
+        if not args:
+            names = sorted(self.current_spec.index.workflows)
+            print(f"Usage: flow [Component.]Workflow [args...]. Available: {names}")
+            return
+
+        workflow = self.current_spec.workflow(args[0])
+        if workflow is None:
+            print(f"Workflow '{args[0]}' not found. Available: {sorted(self.current_spec.index.workflows)}")
+            return
+
+        try:
+            agent = WorkflowAgent(workflow, *args[1:])
+        except WorkflowCompileError as e:
+            print(f"⚠️  {e}")
+            print("💡 Run 'build' to synthesize an implementation instead.")
+            return
+
+        runtime = Runtime()
+        runtime.register_handler(LiteLLMHandler(default_model=self.builder.model_name))
+        runtime.register_handler(SafeREPLHandler())
+        runtime.register_handler(FileSystemHandler())
+        runtime.register_handler(MathHandler())
+        runtime.register_handler(UserInteractionHandler())
+        runtime.register_handler(MessageBusHandler())
+        runtime.register_handler(RecursiveAgentHandler())
+
+        print(f"🚀 Running workflow '{workflow.name}'...")
+        try:
+            result = runtime.run(agent)
+            for event in runtime.trace:
+                print(f"   ⚡ {event['name']}: {event['payload']}")
+            print(f"✅ Result: {result}")
+        except Exception as e:
+            print(f"Error running workflow: {e}")
+
     def do_show(self, arg):
         """Show details of the active spec."""
         if not self.current_spec:
@@ -390,6 +836,8 @@ class SpecREPL(cmd.Cmd):
 
     def do_exit(self, arg):
         """Exit the shell."""
+        if self._verifier is not None:
+            self._verifier.close()
         print("Goodbye.")
         return True
 
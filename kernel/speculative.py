@@ -0,0 +1,178 @@
+import io
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import contextlib
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+from concurrent.futures import Executor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from . import console
+from .builder import Builder
+from .cache import DEFAULT_CACHE_ROOT
+from .codegen import generate_component
+from .compiler import ComponentSpec
+
+# One JSON line per speculative synthesis, used to tune N per model
+DEFAULT_STATS_PATH = os.path.join(DEFAULT_CACHE_ROOT, "speculative.jsonl")
+# Parallel builds record from several threads; one writer at a time keeps lines whole
+_stats_lock = threading.Lock()
+
+# Candidate i (i > 0) samples at base + i * step, capped, so candidates differ.
+# Candidates that share a (capped) temperature are numbered as separate samples,
+# so each one still has its own response-cache entry.
+TEMPERATURE_STEP = 0.15
+MAX_TEMPERATURE = 1.0
+
+def verify_candidate(component: str, code: str, test_file: str) -> List[str]:
+    """
+    Runs DynamicVerifier on one candidate in a private directory. Executed in a
+    worker process, so a candidate that hangs the interpreter or corrupts global
+    state cannot affect the build. Returns the verification errors.
+    """
+    from .verifier import DynamicVerifier
+    work_dir = tempfile.mkdtemp(prefix="spak_candidate_")
+    try:
+        with open(os.path.join(work_dir, f"{component.lower()}.py"), "w", encoding="utf-8") as f:
+            f.write(code)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return DynamicVerifier().run_tests(test_file, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+@dataclass
+class Candidate:
+    index: int
+    temperature: float
+    code: str = ""
+    sample_s: float = 0.0
+    verify_s: Optional[float] = None
+    errors: List[str] = field(default_factory=list)
+    passed: Optional[bool] = None # None: never verified
+    sample: int = 0               # Earlier candidates at the same temperature
+
+@dataclass
+class SpeculativeResult:
+    component: str
+    model: str
+    n: int
+    code: str
+    passed: bool
+    winner: Optional[int]
+    candidates: List[Candidate]
+    total_s: float
+    time_to_first_pass_s: Optional[float]
+
+    @property
+    def pass_rate(self) -> float:
+        verified = [c for c in self.candidates if c.passed is not None]
+        return sum(1 for c in verified if c.passed) / len(verified) if verified else 0.0
+
+    def record(self, path: str = DEFAULT_STATS_PATH):
+        entry = {
+            "time": time.time(), "component": self.component, "model": self.model, "n": self.n,
+            "passed": self.passed, "winner": self.winner, "pass_rate": self.pass_rate,
+            "sampled": sum(1 for c in self.candidates if c.code),
+            "verified": sum(1 for c in self.candidates if c.passed is not None),
+            "total_s": self.total_s, "time_to_first_pass_s": self.time_to_first_pass_s,
+            "candidates": [{k: v for k, v in asdict(c).items() if k != "code"} for c in self.candidates],
+        }
+        line = json.dumps(entry) + "\n"
+        with _stats_lock:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+def synthesize(builder: Builder, spec: ComponentSpec, context_info: str, test_file: str, n: int,
+               verify_pool: Executor) -> SpeculativeResult:
+    """
+    Samples up to n implementations concurrently and verifies each one on verify_pool
+    as soon as it arrives. The first passing candidate wins and the remaining streams
+    are cancelled. If none passes, the candidate with the fewest errors is returned.
+    """
+    start = time.perf_counter()
+    if generate_component(spec).complete:
+        code = builder.implement_component(spec, context_info) # Deterministic: nothing to sample
+        return SpeculativeResult(spec.name, builder.model_name, 1, code, True, None, [],
+                                 time.perf_counter() - start, None)
+
+    base = builder.temperature
+    candidates = [Candidate(i, base if i == 0 else round(min(MAX_TEMPERATURE, base + i * TEMPERATURE_STEP), 2))
+                  for i in range(n)]
+    for i, candidate in enumerate(candidates):
+        candidate.sample = sum(1 for c in candidates[:i] if c.temperature == candidate.temperature)
+    cancel = threading.Event()
+
+    def sample(candidate: Candidate) -> Candidate:
+        t0 = time.perf_counter()
+        with console.prefixed(f"{spec.name}#{candidate.index}"):
+            candidate.code = builder.implement_component(spec, context_info, candidate.temperature, cancel,
+                                                         candidate.sample)
+        candidate.sample_s = time.perf_counter() - t0
+        return candidate
+
+    winner = None
+    first_pass = None
+    verify_started: Dict[int, float] = {}
+    with ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"sample-{spec.name}") as samplers:
+        pending = {samplers.submit(sample, c): ("sample", c) for c in candidates}
+        while pending and winner is None:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, candidate = pending.pop(future)
+                if kind == "sample":
+                    if future.exception() is not None or candidate.code.startswith("# Error"):
+                        continue
+                    verify_started[candidate.index] = time.perf_counter()
+                    pending[verify_pool.submit(verify_candidate, spec.name, candidate.code, test_file)] = ("verify", candidate)
+                    continue
+                candidate.verify_s = time.perf_counter() - verify_started[candidate.index]
+                try:
+                    candidate.errors = future.result()
+                except Exception as e:
+                    candidate.errors = [f"Verification worker failed: {e}"]
+                candidate.passed = not candidate.errors
+                console.say(f"  🎲 Candidate {spec.name}#{candidate.index} (T={candidate.temperature}): "
+                            f"{'✅ passed' if candidate.passed else f'❌ {len(candidate.errors)} error(s)'}")
+                if candidate.passed and winner is None:
+                    winner = candidate
+                    first_pass = time.perf_counter() - start
+        cancel.set() # Stop the remaining streams; queued verifications are dropped
+        for future in pending:
+            future.cancel()
+
+    if winner is None:
+        sampled = [c for c in candidates if c.code and not c.code.startswith("# Error")]
+        verified = [c for c in sampled if c.passed is not None]
+        best = min(verified, key=lambda c: len(c.errors)) if verified else (sampled[0] if sampled else None)
+        code = best.code if best else candidates[0].code
+    else:
+        code = winner.code
+    return SpeculativeResult(spec.name, builder.model_name, n, code, winner is not None,
+                             winner.index if winner else None, candidates,
+                             time.perf_counter() - start, first_pass)
+
+def pass_rates(path: str = DEFAULT_STATS_PATH) -> Dict[tuple, dict]:
+    """Aggregates recorded runs by (model, n): runs, share of runs with a passing candidate, mean time-to-first-pass."""
+    if not os.path.exists(path):
+        return {}
+    groups: Dict[tuple, list] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            groups.setdefault((entry["model"], entry["n"]), []).append(entry)
+    summary = {}
+    for key, runs in groups.items():
+        ttfp = [r["time_to_first_pass_s"] for r in runs if r["time_to_first_pass_s"] is not None]
+        summary[key] = {
+            "runs": len(runs),
+            "pass_at_n": sum(1 for r in runs if r["passed"]) / len(runs),
+            "candidate_pass_rate": sum(r["pass_rate"] for r in runs) / len(runs),
+            "mean_time_to_first_pass_s": sum(ttfp) / len(ttfp) if ttfp else None,
+        }
+    return summary
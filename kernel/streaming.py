@@ -0,0 +1,84 @@
+import codeop
+import warnings
+from typing import Optional
+
+class StreamCancelled(Exception):
+    """Raised when a stream is closed early because its result is no longer needed."""
+    pass
+
+class CodeStreamExtractor:
+    """
+    Follows a streamed LLM response and decides when to stop reading it.
+
+    - Once the first code fence has been closed, the rest of the response
+      (usually explanations) is not needed: `done` becomes True.
+    - For Python fences, every completed line is checked with codeop, which tells
+      incomplete input (more lines may fix it) apart from a syntax error no
+      continuation can repair. On the latter `aborted` becomes True and `error`
+      describes it, so the caller can cancel the stream and retry immediately.
+
+    Text without any fence is treated as bare code, like Builder._extract_code.
+    """
+    def __init__(self, language: str = "python", check_syntax: bool = True):
+        self.language = language
+        self.check_syntax = check_syntax and language == "python"
+        self.text = ""
+        self.done = False
+        self.aborted = False
+        self.error: Optional[str] = None
+        self._fence_open = False
+        self._seen_fence = False
+        self._code_lines = []
+        self._scanned = 0 # Offset in text up to which complete lines were processed
+
+    @property
+    def code(self) -> str:
+        return "\n".join(self._code_lines).strip()
+
+    def feed(self, chunk: str) -> bool:
+        """Consumes one streamed chunk. Returns True when the stream should stop."""
+        if self.done or self.aborted:
+            return True
+        self.text += chunk
+        while True:
+            end = self.text.find("\n", self._scanned)
+            if end == -1:
+                break
+            line = self.text[self._scanned:end]
+            self._scanned = end + 1
+            if self._consume_line(line):
+                return True
+        # A closing fence may arrive without a trailing newline
+        tail = self.text[self._scanned:]
+        if self._fence_open and tail.strip() == "```":
+            self.done = True
+        return self.done
+
+    def _consume_line(self, line: str) -> bool:
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            if self._fence_open:
+                self.done = True
+                return True
+            if not self._seen_fence:
+                self._fence_open = self._seen_fence = True
+                self._code_lines = [] # Anything before the first fence is prose
+                return False
+        if self._fence_open or not self._seen_fence:
+            self._code_lines.append(line)
+            if self._fence_open and self.check_syntax and self._unrecoverable():
+                self.aborted = True
+                return True
+        return False
+
+    def _unrecoverable(self) -> bool:
+        source = "\n".join(self._code_lines) + "\n"
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            try:
+                codeop.compile_command(source, "<stream>", "exec")
+            except (SyntaxError, ValueError, OverflowError) as e:
+                line = getattr(e, "lineno", None)
+                self.error = f"{getattr(e, 'msg', e)} (line {line})" if line else str(e)
+                return True
+        return False
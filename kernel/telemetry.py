@@ -0,0 +1,140 @@
+import json
+import math
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass, asdict, field
+from typing import Callable, Dict, List, Optional
+from . import console
+
+# Encoding for models tiktoken does not know (e.g. ollama/*), as litellm also uses
+DEFAULT_ENCODING = "cl100k_base"
+
+_counters: Dict[str, Optional[Callable[[str], int]]] = {}
+_counters_lock = threading.Lock()
+_UNLOADED = object()
+
+def _load_counter(model: Optional[str]) -> Optional[Callable[[str], int]]:
+    try:
+        import tiktoken
+    except ImportError:
+        tiktoken = None
+    if tiktoken is not None:
+        try:
+            try:
+                encoding = tiktoken.encoding_for_model((model or "").split("/")[-1])
+            except KeyError:
+                encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+            return lambda text: len(encoding.encode(text, disallowed_special=()))
+        except Exception as e: # Installed, but its BPE file could not be fetched or read
+            console.say(f"⚠️ [Telemetry] tiktoken could not load an encoding for '{model}': {e}")
+    try:
+        import litellm
+        litellm.token_counter(model=model or "gpt-3.5-turbo", text="probe")
+        return lambda text: litellm.token_counter(model=model or "gpt-3.5-turbo", text=text)
+    except Exception as e:
+        console.say(f"⚠️ [Telemetry] No tokenizer for '{model}' ({e}); estimating 4 characters per token")
+        return None
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Token count of text for model, from a tokenizer loaded once per model: tiktoken
+    (the model's encoding, else cl100k_base), or litellm's token_counter if tiktoken
+    is unavailable. The same tokenizer serves live and cached calls and prompt
+    budgeting alike. Only if neither can be loaded is the count estimated at ~4
+    characters per token.
+    """
+    if not text:
+        return 0
+    key = model or ""
+    counter = _counters.get(key, _UNLOADED)
+    if counter is _UNLOADED:
+        # Loaded outside the lock: tiktoken may download its BPE file on first use, and
+        # other models' counts must not wait for that. Racing loaders keep the first result.
+        loaded = _load_counter(model)
+        with _counters_lock:
+            counter = _counters.setdefault(key, loaded)
+    if counter is not None:
+        try:
+            return counter(text)
+        except Exception:
+            pass
+    return math.ceil(len(text) / 4) # Last resort
+
+@dataclass
+class CallMetrics:
+    model: str
+    kind: str                      # implement, fix_implementation, generate_tests, fix_tests, patch_*
+    prompt_tokens: int
+    completion_tokens: int = 0
+    ttft_s: Optional[float] = None # Time to first token
+    wall_s: float = 0.0
+    cached: bool = False
+    outcome: str = "ok"            # ok, aborted (syntax), cancelled, error
+    time: float = field(default_factory=time.time)
+
+    @property
+    def tokens_per_s(self) -> Optional[float]:
+        """Decode speed: completion tokens over the time after the first token."""
+        if self.cached or self.ttft_s is None or self.wall_s <= self.ttft_s:
+            return None
+        return self.completion_tokens / (self.wall_s - self.ttft_s)
+
+def _mean(values) -> Optional[float]:
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+def _percentile(values, q: float) -> Optional[float]:
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+class Telemetry:
+    """
+    Collects CallMetrics for every Builder LLM call. Aggregates per (model, kind)
+    are kept in full; individual calls only for the most recent `keep` calls.
+    """
+    def __init__(self, keep: int = 1000):
+        self.calls = deque(maxlen=keep)
+        self._totals: Dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, metrics: CallMetrics):
+        with self._lock:
+            self.calls.append(metrics)
+            totals = self._totals.setdefault((metrics.model, metrics.kind), {
+                "calls": 0, "cached": 0, "failed": 0, "prompt_tokens": 0, "completion_tokens": 0, "wall_s": 0.0,
+            })
+            totals["calls"] += 1
+            totals["cached"] += metrics.cached
+            totals["failed"] += metrics.outcome != "ok"
+            totals["prompt_tokens"] += metrics.prompt_tokens
+            totals["completion_tokens"] += metrics.completion_tokens
+            totals["wall_s"] += metrics.wall_s
+
+    def summary(self) -> List[dict]:
+        """One row per (model, kind). Latency figures cover live (uncached) calls still in `calls`."""
+        with self._lock:
+            calls = list(self.calls)
+            totals = {key: dict(value) for key, value in self._totals.items()}
+        rows = []
+        for (model, kind), row in sorted(totals.items()):
+            live = [c for c in calls if c.model == model and c.kind == kind and not c.cached]
+            row.update({
+                "model": model, "kind": kind,
+                "mean_prompt_tokens": row["prompt_tokens"] / row["calls"],
+                "mean_ttft_s": _mean(c.ttft_s for c in live),
+                "p95_ttft_s": _percentile([c.ttft_s for c in live], 0.95),
+                "mean_tokens_per_s": _mean(c.tokens_per_s for c in live),
+                "mean_wall_s": _mean(c.wall_s for c in live),
+            })
+            rows.append(row)
+        return rows
+
+    def export(self, path: str):
+        """Writes summary and recent calls as JSON, for comparing runs."""
+        with self._lock:
+            calls = [dict(asdict(c), tokens_per_s=c.tokens_per_s) for c in self.calls]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"exported": time.time(), "summary": self.summary(), "calls": calls}, f, indent=2)
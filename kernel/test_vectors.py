@@ -0,0 +1,145 @@
+import json
+import yaml
+from typing import Dict, List, Optional, Tuple
+from .compiler import ComponentSpec, TypeRef
+
+# YAML test vector files (tests/tests.<component>.yaml) have the shape:
+#   system: Name
+#   component: Name
+#   tests:
+#     - name: test_x
+#       function: f
+#       input: {arg: value}
+#       expected: value
+#
+# The LLM is asked for the same structure as JSON (constrained by a JSON schema
+# where the backend supports it), which is validated against the component's
+# function signatures and only then written out as YAML.
+
+# AgentSpec types -> accepted Python types of YAML/JSON values
+_VALUE_TYPES = {
+    "String": (str,), "Int": (int,), "Integer": (int,), "Float": (int, float), "Number": (int, float),
+    "Bool": (bool,), "Boolean": (bool,), "List": (list,), "Map": (dict,), "Dict": (dict,),
+}
+
+def extract_yaml(text: str) -> str:
+    """The body of the first ```yaml (or bare ```) block, or the whole text."""
+    if "```yaml" in text:
+        return text.split("```yaml")[1].split("```")[0].strip()
+    if "```" in text:
+        return text.split("```")[1].split("```")[0].strip()
+    return text.strip()
+
+def extract_json(text: str):
+    """Parses the JSON object in a response (fenced or bare). Raises ValueError."""
+    text = text.strip()
+    if "```" in text:
+        text = text.split("```")[1]
+        text = text[len("json"):] if text.startswith("json") else text
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("no JSON object in response")
+    return json.loads(text[start:end + 1])
+
+def _tests_schema(spec: ComponentSpec) -> dict:
+    function = {"type": "string"}
+    if spec.functions:
+        function["enum"] = [f.name for f in spec.functions]
+    return {
+        "type": "array",
+        "minItems": 1,
+        "items": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "function": function,
+                "input": {"type": "object"},
+                "expected": {},
+            },
+            "required": ["name", "function", "input", "expected"],
+        },
+    }
+
+def vector_schema(spec: ComponentSpec) -> dict:
+    """JSON schema of one component's test vectors."""
+    return {
+        "type": "object",
+        "properties": {"component": {"type": "string", "enum": [spec.name]}, "tests": _tests_schema(spec)},
+        "required": ["component", "tests"],
+    }
+
+def batch_schema(specs: List[ComponentSpec]) -> dict:
+    """JSON schema of test vectors for several components: {"components": [vector_schema, ...]}."""
+    return {
+        "type": "object",
+        "properties": {"components": {"type": "array", "items": {
+            "type": "object",
+            "properties": {"component": {"type": "string", "enum": [s.name for s in specs]},
+                           "tests": {"type": "array", "items": {"type": "object"}}},
+            "required": ["component", "tests"],
+        }}},
+        "required": ["components"],
+    }
+
+def _value_matches(value, ref: TypeRef) -> bool:
+    accepted = _VALUE_TYPES.get(ref.name)
+    if accepted is None or value is None:
+        return True # Spec-level or unknown types are not checked
+    if isinstance(value, bool) and bool not in accepted:
+        return False # bool is an int subclass, but not an Int argument
+    return isinstance(value, accepted)
+
+def validate_vectors(tests, spec: ComponentSpec) -> Tuple[List[dict], List[str]]:
+    """
+    Checks each test against the component's signatures: known function, exactly
+    the declared parameters, and argument values of the declared types.
+    Returns (valid tests, problems with the rejected ones).
+    """
+    if not isinstance(tests, list):
+        return [], ["'tests' is not a list"]
+    functions = {f.name: f for f in spec.functions}
+    valid, problems, seen = [], [], set()
+    for i, test in enumerate(tests):
+        label = test.get("name", f"#{i + 1}") if isinstance(test, dict) else f"#{i + 1}"
+        if not isinstance(test, dict) or not isinstance(test.get("name"), str) or "expected" not in test:
+            problems.append(f"test {label}: needs name, function, input and expected")
+            continue
+        if test["name"] in seen:
+            problems.append(f"test {label}: duplicate name")
+            continue
+        inputs = test.get("input") or {}
+        if not isinstance(inputs, dict):
+            problems.append(f"test {label}: input is not a mapping")
+            continue
+        func = functions.get(test.get("function"))
+        if functions and func is None:
+            problems.append(f"test {label}: unknown function '{test.get('function')}'")
+            continue
+        if func is not None:
+            params = {p.name: p.type for p in func.params}
+            if set(inputs) != set(params):
+                problems.append(f"test {label}: arguments {sorted(inputs)} do not match {func.name}({', '.join(params)})")
+                continue
+            wrong = [name for name, value in inputs.items() if not _value_matches(value, params[name])]
+            if wrong:
+                problems.append(f"test {label}: wrong argument type for {', '.join(wrong)}")
+                continue
+        seen.add(test["name"])
+        valid.append({"name": test["name"], "function": test.get("function"), "input": inputs, "expected": test["expected"]})
+    return valid, problems
+
+def validate_tests(config, spec: ComponentSpec) -> Optional[str]:
+    """Returns why a parsed test file does not fit the component, or None if it does."""
+    if not isinstance(config, dict):
+        return "not a mapping"
+    if str(config.get("component", "")).lower() != spec.name.lower():
+        return f"component is '{config.get('component')}'"
+    valid, problems = validate_vectors(config.get("tests"), spec)
+    if problems:
+        return problems[0]
+    return None if valid else "no tests"
+
+def to_yaml(system_name: str, spec: ComponentSpec, tests: List[dict]) -> str:
+    document = {"system": system_name, "component": spec.name, "tests": tests}
+    # Flow style for leaf collections keeps inputs on one line: input: {a: 5, b: 3}
+    return yaml.safe_dump(document, sort_keys=False, default_flow_style=None, allow_unicode=True)
@@ -1,122 +1,374 @@
-import ast
+import io
 import os
-import importlib.util
+import time
+import contextlib
 import yaml
-from typing import List, Dict, Any, Optional
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Set, Tuple
 from .compiler import SystemSpec, ComponentSpec, FunctionSpec
 from .runtime import Runtime
-from .handlers import LiteLLMHandler, MathHandler, UserInteractionHandler, MessageBusHandler, RecursiveAgentHandler
+from .source_index import SourceFile, index_for
+from .cache import ResultCache
+from .module_cache import modules, preload, preload_names, warm_worker
+from .handlers import LiteLLMHandler, CassetteHandler, MathHandler, UserInteractionHandler, MessageBusHandler, RecursiveAgentHandler
 import kernel.semantic_kernel as sk
 
 class StaticVerifier:
+    def __init__(self):
+        self.missing_components: List[str] = [] # Names from the last verify(), in spec order
+
     def verify(self, spec: SystemSpec, src_dir: str) -> List[str]:
         errors = []
+        self.missing_components = []
         print(f"\n[Static Analysis] Starting verification for system: {spec.name}")
+        start = time.perf_counter()
+        index = index_for(src_dir)
         for component in spec.components:
             found = False
-            for root, _, files in os.walk(src_dir):
-                for file in files:
-                    if file.endswith(".py") and file.startswith(component.name.lower()):
-                        path = os.path.join(root, file)
-                        if self._check_file_for_class(path, component, errors):
-                            found = True
-                            print(f"  ✅ Found '{component.name}' in {path}")
-                            break
-                if found: break
+            for source in index.with_prefix(component.name.lower()):
+                if self._check_file_for_class(source, component, errors):
+                    found = True
+                    print(f"  ✅ Found '{component.name}' in {source.path}")
+                    break
             if not found:
                 errors.append(f"Missing implementation for Component '{component.name}'")
+                self.missing_components.append(component.name)
+        print(f"  ⏱️  {len(index.files)} source file(s) indexed ({index.parsed} parsed) "
+              f"in {(time.perf_counter() - start) * 1000:.1f} ms")
         return errors
 
-    def _check_file_for_class(self, file_path: str, component: ComponentSpec, errors: List[str]) -> bool:
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                tree = ast.parse(f.read())
-        except Exception as e:
-            errors.append(f"Syntax Error in {file_path}: {str(e)}")
+    def _check_file_for_class(self, source: SourceFile, component: ComponentSpec, errors: List[str]) -> bool:
+        if source.error is not None:
+            errors.append(f"Syntax Error in {source.path}: {source.error}")
             return False
-        class_node = next((n for n in ast.walk(tree) if isinstance(n, ast.ClassDef) and n.name == component.name), None)
-        if not class_node: return False
-        implemented_methods = {n.name for n in class_node.body if isinstance(n, ast.FunctionDef)}
+        implemented_methods = source.classes.get(component.name)
+        if implemented_methods is None: return False
         for func in component.functions:
             if func.name not in implemented_methods:
                 errors.append(f"Method '{func.name}' missing in {component.name}")
         return True
 
+@dataclass
+class TestResult:
+    index: int
+    name: str
+    error: Optional[str] = None # None: passed
+    detail: str = ""            # Printed under a failure
+    seconds: float = 0.0
+    output: str = ""            # What the test printed (e.g. handler messages)
+    cached: bool = False        # Passed in an earlier run with the same fingerprint
+
+# Set SPAK_CASSETTE=record or replay to serve Generate effects from recorded cassettes
+CASSETTE_ENV = "SPAK_CASSETTE"
+VERIFY_MODEL = "ollama/qwen2.5-coder:7b"
+
+def cassette_mode() -> Optional[str]:
+    """The cassette mode from SPAK_CASSETTE, or None for live LLM calls."""
+    mode = os.environ.get(CASSETTE_ENV, "").strip().lower()
+    if mode in ("", "off", "live"):
+        return None
+    if mode not in CassetteHandler.MODES:
+        print(f"⚠️ [Verifier] Ignoring invalid {CASSETTE_ENV} value '{mode}'")
+        return None
+    return mode
+
+def cassette_dir_for(test_file: str) -> str:
+    """tests/tests.responder.yaml -> tests/cassettes/responder"""
+    stem = os.path.splitext(os.path.basename(test_file))[0]
+    stem = stem[len("tests."):] if stem.startswith("tests.") else stem
+    return os.path.join(os.path.dirname(test_file), "cassettes", stem)
+
+def _make_runtime(test_file: Optional[str] = None, cassette: Optional[str] = None) -> Runtime:
+    """A fresh Runtime with the verification handler set."""
+    runtime = Runtime()
+    llm = LiteLLMHandler(default_model=VERIFY_MODEL)
+    if cassette and test_file:
+        llm = CassetteHandler(cassette_dir_for(test_file), cassette, inner=llm)
+    runtime.register_handler(llm)
+    runtime.register_handler(MathHandler())
+    runtime.register_handler(UserInteractionHandler(input_queue=["Hello", "Yes", "Goodbye"]))
+    runtime.register_handler(MessageBusHandler())
+    runtime.register_handler(RecursiveAgentHandler()) # Level 5
+    return runtime
+
+def handler_config(test_file: Optional[str] = None, cassette: Optional[str] = None) -> list:
+    """The verification handlers and their settings, as part of every test fingerprint."""
+    return [[type(h).__name__, h.fingerprint() if isinstance(h, CassetteHandler) else vars(h)]
+            for h in _make_runtime(test_file, cassette).handlers]
+
+def _load_instance(comp_name: str, src_dir: str):
+    module_path = os.path.join(src_dir, f"{comp_name.lower()}.py")
+    # Re-executed only when the file or a module it imports from src_dir changed,
+    # the same digest the result cache fingerprints tests with
+    index = index_for(src_dir)
+    module = modules.load(module_path, comp_name, version=index.digest(module_path),
+                          dependencies=[f.path for f in index.dependencies(module_path)])
+    return getattr(module, comp_name)()
+
+def _run_test(instance, index: int, test: dict) -> TestResult:
+    result = TestResult(index, test['name'])
+    captured = io.StringIO()
+    start = time.perf_counter()
+    try:
+        # Captured so output can be replayed in test order, whichever process ran the test
+        with contextlib.redirect_stdout(captured):
+            func_name = test.get('function')
+            if func_name:
+                func = getattr(instance, func_name)
+                # Execute with provided input
+                value = func(**test.get('input', {}))
+                
+                expected = test.get('expected')
+                
+                # Soft Match for LLM outputs (contains vs exact)
+                is_match = value == expected
+                if isinstance(value, str) and isinstance(expected, str):
+                    if expected in value or value in expected:
+                        is_match = True
+                
+                if not is_match:
+                    result.detail = f"Expected '{expected}', got '{value}'"
+                    result.error = f"{result.name}: {result.detail}"
+    except Exception as e:
+        result.error = f"{result.name}: Runtime Error: {str(e)}"
+        result.detail = str(e)
+    result.seconds = time.perf_counter() - start
+    result.output = captured.getvalue()
+    return result
+
+def run_shard(test_file: str, src_dir: str, indices: Optional[List[int]] = None,
+              cassette: Optional[str] = None) -> Tuple[Optional[str], List[TestResult]]:
+    """
+    Runs the tests at `indices` (all if None) of one YAML file with its own Runtime and
+    component instance. Used in-process and as the worker of parallel verification.
+    Returns (file-level error, results).
+    """
+    runtime = _make_runtime(test_file, cassette)
+    sk._active_runtime = runtime
+    try:
+        with open(test_file, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f)
+        tests = config.get('tests', [])
+        try:
+            instance = _load_instance(config['component'], src_dir)
+        except Exception as e:
+            return f"Module Load Error: {str(e)}", []
+        selected = range(len(tests)) if indices is None else indices
+        return None, [_run_test(instance, i, tests[i]) for i in selected]
+    except Exception as e:
+        return f"General Test Failure: {str(e)}", []
+    finally:
+        sk._active_runtime = None
+
+def _load_config(test_file: str) -> Optional[dict]:
+    try:
+        with open(test_file, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f)
+    except Exception:
+        return None
+    return config if isinstance(config, dict) else None
+
+def plan_shards(test_files: List[str], jobs: int,
+                selected: Optional[Dict[str, Optional[List[int]]]] = None) -> List[Tuple[str, Optional[List[int]]]]:
+    """
+    Splits test files into (file, test indices) shards for `jobs` workers. Whole files
+    are the unit while there are enough of them; otherwise files marked 'parallel: true'
+    are split into contiguous chunks. Each shard runs on a fresh component instance,
+    and tests in a file may rely on state left by earlier ones, so splitting is opt-in.
+    `selected` limits a file to some of its tests (None: all of them).
+    """
+    selected = selected or {}
+    sizes = {}
+    for path in test_files:
+        config = _load_config(path)
+        if config is None:
+            sizes[path] = (None, False) # Let the worker report the error
+            continue
+        indices = selected.get(path)
+        indices = list(range(len(config.get('tests') or []))) if indices is None else indices
+        sizes[path] = (indices, config.get('parallel') is True)
+    if len(test_files) >= jobs:
+        return [(path, selected.get(path)) for path in test_files]
+    total = sum(len(indices or []) for indices, _ in sizes.values()) or 1
+    shards = []
+    for path in test_files:
+        indices, splittable = sizes[path]
+        n = len(indices or [])
+        chunks = 1 if not splittable or n < 2 else max(1, min(n, round(jobs * n / total)))
+        if chunks == 1:
+            shards.append((path, selected.get(path)))
+            continue
+        step = -(-n // chunks)
+        shards.extend((path, indices[i:i + step]) for i in range(0, n, step))
+    return shards
+
 class DynamicVerifier:
-    def run_tests(self, test_file: str, src_dir: str = "src") -> List[str]:
-        errors = []
+    """
+    Runs YAML test vectors against component modules. With a ResultCache, each test
+    is fingerprinted by its YAML entry, the hash of the component module and the
+    src modules it imports, and the handler configuration; a test whose fingerprint
+    passed before is reported from the cache instead of being run (unless `force`, or
+    while recording cassettes).
+    Unless a file is marked 'parallel: true', all of its tests are re-run if any of
+    them changed, since they share one component instance.
+
+    `cassette` ("record" or "replay", default from SPAK_CASSETTE) routes Generate
+    effects through a CassetteHandler on tests/cassettes/<component>/.
+
+    Component modules are reused until they or the src modules they import change
+    (module_cache), and the worker pool of parallel runs is kept warm between runs
+    with the same job count.
+    Each worker imports the kernel and the `preload` modules (default from
+    SPAK_VERIFY_PRELOAD) once, when it starts.
+    """
+    def __init__(self, cache: Optional[ResultCache] = None, cassette: Optional[str] = None,
+                 preload: Optional[List[str]] = None):
+        self.cache = cache
+        self.cassette = cassette if cassette is not None else cassette_mode()
+        self.preload = preload if preload is not None else preload_names()
+        self._preloaded = False
+        self._pool = None
+        self._pool_jobs = 0
+        self.force = False  # Run every test, refreshing the cache
+        self.skipped = 0    # Tests answered from the cache since the last reset_savings()
+        self.saved_s = 0.0  # Their recorded run time
+
+    def _worker_pool(self, jobs: int):
+        from concurrent.futures import ProcessPoolExecutor
+        if self._pool is None or self._pool_jobs != jobs:
+            self.close()
+            self._pool = ProcessPoolExecutor(max_workers=jobs, initializer=warm_worker, initargs=(self.preload,))
+            self._pool_jobs = jobs
+        return self._pool
+
+    def close(self):
+        """Shuts down the warm worker pool, if any."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool, self._pool_jobs = None, 0
+
+    def reset_savings(self):
+        self.skipped, self.saved_s = 0, 0.0
+
+    def _lookup(self, test_file: str, src_dir: str) -> Tuple[Optional[List[int]], List[TestResult], Dict[int, str]]:
+        """Returns (indices to run or None for all, cached results, {index: fingerprint key})."""
+        config = _load_config(test_file) if self.cache is not None else None
+        if config is None or not isinstance(config.get('tests'), list) or not config.get('component'):
+            return None, [], {}
+        if self.cassette == "record":
+            # Recording must reach the handler, so every test runs; no keys, so nothing is
+            # stored under record-mode fingerprints that replay and normal runs never look up
+            return None, [], {}
+        component = str(config['component'])
+        source = index_for(src_dir).digest(os.path.join(src_dir, f"{component.lower()}.py"))
+        if source is None:
+            return None, [], {} # Module missing: nothing to fingerprint, let the run report it
+        handlers = handler_config(test_file, self.cassette)
+        keys, pending, cached = {}, [], []
+        for i, test in enumerate(config['tests']):
+            keys[i] = self.cache.key_for(component, source, handlers, test)
+            hit = None if self.force else self.cache.get(keys[i])
+            if hit is None:
+                pending.append(i)
+            else:
+                cached.append(TestResult(i, test.get('name', f"#{i + 1}"), seconds=hit.get("seconds", 0.0),
+                                         output=hit.get("output", ""), cached=True))
+        if pending and config.get('parallel') is not True:
+            return None, [], keys # Later tests may depend on state from earlier ones
+        return pending, cached, keys
+
+    def _store(self, keys: Dict[int, str], results: List[TestResult]):
+        for result in results:
+            if result.error is None and not result.cached and result.index in keys:
+                self.cache.put(keys[result.index], {"name": result.name, "seconds": result.seconds, "output": result.output})
+
+    def _report(self, test_file: str, file_error: Optional[str], results: List[TestResult]) -> List[str]:
+        """Prints per-test outcomes with timings and returns them in the error list format."""
         print(f"\n[Dynamic Analysis] Running tests from: {test_file}")
-        
-        # Setup Runtime for Side Effects
-        runtime = Runtime()
-        runtime.register_handler(LiteLLMHandler(default_model="ollama/qwen2.5-coder:7b"))
-        runtime.register_handler(MathHandler())
-        runtime.register_handler(UserInteractionHandler(input_queue=["Hello", "Yes", "Goodbye"]))
-        runtime.register_handler(MessageBusHandler())
-        runtime.register_handler(RecursiveAgentHandler()) # Level 5
-        sk._active_runtime = runtime
-        
-        try:
-            with open(test_file, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-            
-            comp_name = config['component']
-            module_path = os.path.join(src_dir, f"{comp_name.lower()}.py")
-            
-            # Load the module with error reporting
-            try:
-                spec = importlib.util.spec_from_file_location(comp_name, module_path)
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-            except Exception as e:
-                print(f"  💥 Failed to load module {module_path}: {e}")
-                return [f"Module Load Error: {str(e)}"]
-            
-            cls = getattr(module, comp_name)
-            instance = cls()
-
-            for test in config.get('tests', []):
-                name = test['name']
-                print(f"  🧪 Running {name}...", end=" ", flush=True)
-                
+        if file_error:
+            if file_error.startswith("Module Load Error"):
+                print(f"  💥 Failed to load module: {file_error.split(': ', 1)[1]}")
+            else:
+                print(f"💥 General Failure: {file_error.split(': ', 1)[1]}")
+            return [file_error]
+        errors = []
+        for result in results:
+            timing = f"({result.seconds * 1000:.1f} ms)"
+            if result.cached:
+                print(f"  ⏭️  Unchanged {result.name}... ✅ PASS (cached, {result.seconds * 1000:.1f} ms saved)")
+                self.skipped += 1
+                self.saved_s += result.seconds
+                continue
+            print(f"  🧪 Running {result.name}... {result.output}", end="")
+            if result.error is None:
+                print(f"✅ PASS {timing}")
+            elif ": Runtime Error: " in result.error:
+                print(f"❌ ERROR ({result.detail}) {timing}")
+                errors.append(result.error)
+            else:
+                print(f"❌ FAIL {timing}")
+                print(f"     └─ {result.detail}")
+                errors.append(result.error)
+        return errors
+
+    def run_tests(self, test_file: str, src_dir: str = "src") -> List[str]:
+        if not self._preloaded:
+            preload(self.preload)
+            self._preloaded = True
+        pending, cached, keys = self._lookup(test_file, src_dir)
+        file_error, results = run_shard(test_file, src_dir, pending, self.cassette) if pending != [] else (None, [])
+        self._store(keys, results)
+        return self._report(test_file, file_error, sorted(cached + results, key=lambda r: r.index))
+
+    def run_many(self, test_files: List[str], src_dir: str = "src", jobs: int = 1) -> Dict[str, List[str]]:
+        """
+        Runs several test files, sharded across `jobs` worker processes (each with its own
+        Runtime and handlers). Output and errors are merged back in file and test order.
+        Returns {test_file: errors}.
+        """
+        if jobs <= 1 or not test_files:
+            return {path: self.run_tests(path, src_dir) for path in test_files}
+
+        lookups = {path: self._lookup(path, src_dir) for path in test_files}
+        to_run = [path for path in test_files if lookups[path][0] != []]
+        shards = plan_shards(to_run, jobs, {path: lookups[path][0] for path in to_run})
+        start = time.perf_counter()
+        merged: Dict[str, Tuple[Optional[str], List[TestResult]]] = {path: (None, list(lookups[path][1])) for path in test_files}
+        if shards:
+            pool = self._worker_pool(jobs)
+            futures = [(path, pool.submit(run_shard, path, src_dir, indices, self.cassette)) for path, indices in shards]
+            broken = False
+            for path, future in futures:
                 try:
-                    func_name = test.get('function')
-                    if func_name:
-                        func = getattr(instance, func_name)
-                        # Execute with provided input
-                        result = func(**test.get('input', {}))
-                        
-                        expected = test.get('expected')
-                        
-                        # Soft Match for LLM outputs (contains vs exact)
-                        is_match = result == expected
-                        if isinstance(result, str) and isinstance(expected, str):
-                            if expected in result or result in expected:
-                                is_match = True
-                        
-                        if not is_match:
-                            err = f"Expected '{expected}', got '{result}'"
-                            errors.append(f"{name}: {err}")
-                            print(f"❌ FAIL")
-                            print(f"     └─ {err}")
-                        else:
-                            print("✅ PASS")
+                    file_error, results = future.result()
                 except Exception as e:
-                    errors.append(f"{name}: Runtime Error: {str(e)}")
-                    print(f"❌ ERROR ({str(e)})")
-                    
-        except Exception as e:
-            errors.append(f"General Test Failure: {str(e)}")
-            print(f"💥 General Failure: {e}")
-        finally:
-             sk._active_runtime = None
-            
+                    file_error, results = f"General Test Failure: {str(e)}", []
+                    broken = True
+                self._store(lookups[path][2], results)
+                previous_error, previous = merged[path]
+                merged[path] = (previous_error or file_error, previous + results)
+            if broken:
+                self.close() # Not reused: a worker may have died
+
+        errors = {}
+        busy = 0.0
+        for path in test_files:
+            file_error, results = merged[path]
+            results.sort(key=lambda r: r.index)
+            busy += sum(r.seconds for r in results if not r.cached)
+            errors[path] = self._report(path, file_error, results)
+        if shards:
+            print(f"\n⚡ [Dynamic Analysis] {len(shards)} shard(s) of {len(test_files)} file(s) on {jobs} "
+                  f"warm processes: {time.perf_counter() - start:.2f}s wall, {busy:.2f}s in tests")
         return errors
 
 class Verifier:
-    def __init__(self):
+    def __init__(self, results: Optional[ResultCache] = None):
         self.static = StaticVerifier()
-        self.dynamic = DynamicVerifier()
+        self.dynamic = DynamicVerifier(results)
+
+    def close(self):
+        self.dynamic.close()
 
     def verify_structure(self, spec: SystemSpec, src_dir: str) -> List[str]:
         return self.static.verify(spec, src_dir)
@@ -124,16 +376,22 @@ class Verifier:
     def verify_behavior(self, test_path: str, src_dir: str = "src") -> List[str]:
         return self.dynamic.run_tests(test_path, src_dir)
 
-    def verify_spec(self, spec: SystemSpec, src_dir: str = "src") -> bool:
+    def verify_spec(self, spec: SystemSpec, src_dir: str = "src", jobs: int = 1,
+                    components: Optional[Set[str]] = None) -> bool:
+        """Checks structure, then runs the tests of every component, or only of those named in `components`."""
         # 1. Structural
         errors = self.verify_structure(spec, src_dir)
         
         # 2. Behavioral
-        for comp in spec.components:
-            test_file = os.path.join("tests", f"tests.{comp.name.lower()}.yaml")
-            if os.path.exists(test_file):
-                dynamic_errors = self.verify_behavior(test_file, src_dir)
-                errors.extend(dynamic_errors)
+        test_files = [os.path.join("tests", f"tests.{comp.name.lower()}.yaml") for comp in spec.components
+                      if components is None or comp.name in components]
+        test_files = [path for path in test_files if os.path.exists(path)]
+        self.dynamic.reset_savings()
+        for dynamic_errors in self.dynamic.run_many(test_files, src_dir, jobs).values():
+            errors.extend(dynamic_errors)
+        if self.dynamic.skipped:
+            print(f"\n💾 [Dynamic Analysis] {self.dynamic.skipped} unchanged test(s) answered from the result cache, "
+                  f"saving {self.dynamic.saved_s:.2f}s of test time")
         
         print("-" * 50)
         if errors:
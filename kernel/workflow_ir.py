@@ -0,0 +1,192 @@
+import re
+import ast
+import textwrap
+from dataclasses import dataclass
+from typing import Any, Callable, Generator, Optional, Tuple
+from .effect_bindings import render_effect, EFFECT_NAMESPACE
+from .semantic_kernel import Agent, AgentSpec, State
+
+# --- IR Nodes ---
+# Expressions are kept as validated Python source so the same IR can be
+# interpreted here and emitted verbatim by code generation.
+
+@dataclass(frozen=True, slots=True)
+class PerformOp:
+    effect: str
+    operation: str
+    args: Tuple[str, ...]
+    target: Optional[str] = None # Variable receiving the result
+    returns: bool = False        # 'return perform ...'
+
+@dataclass(frozen=True, slots=True)
+class AssignOp:
+    target: str
+    expr: str
+
+@dataclass(frozen=True, slots=True)
+class ReturnOp:
+    expr: str
+
+@dataclass(frozen=True, slots=True)
+class OpaqueOp:
+    """A statement outside the IR subset. Workflows containing one still need synthesis."""
+    source: str
+    reason: str
+
+@dataclass(frozen=True, slots=True)
+class StepIR:
+    name: str
+    ops: Tuple[Any, ...]
+
+    @property
+    def compilable(self) -> bool:
+        return not any(isinstance(op, OpaqueOp) for op in self.ops)
+
+class WorkflowCompileError(Exception):
+    pass
+
+# --- Step Parsing ---
+
+_PERFORM_CALL = re.compile(r"\bperform\s+([A-Za-z_]\w*)\.([A-Za-z_]\w*)\s*\(")
+_PERFORM_MARKER = "__perform__"
+
+# Expression nodes allowed in step bodies: data, names and operators only (no calls or attributes)
+_SAFE_NODES = (
+    ast.Expression, ast.Constant, ast.Name, ast.Load, ast.BinOp, ast.UnaryOp, ast.BoolOp,
+    ast.Compare, ast.IfExp, ast.JoinedStr, ast.FormattedValue, ast.List, ast.Tuple, ast.Dict,
+    ast.Subscript, ast.Slice, ast.operator, ast.unaryop, ast.boolop, ast.cmpop,
+)
+
+def _check_expr(node: ast.AST) -> Optional[str]:
+    """Returns the reason the expression is outside the subset, or None if it is safe."""
+    for child in ast.walk(node):
+        if not isinstance(child, _SAFE_NODES):
+            return f"unsupported expression ({type(child).__name__})"
+        if isinstance(child, ast.Name) and child.id.startswith("__"):
+            return f"unsupported name '{child.id}'"
+    return None
+
+def _perform_call(node: ast.AST) -> Optional[ast.Call]:
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id == _PERFORM_MARKER):
+        return node
+    return None
+
+def _lower_perform(call: ast.Call, source: str, target=None, returns=False):
+    effect, operation = call.args[0].value, call.args[1].value
+    args = call.args[2:]
+    if call.keywords:
+        return OpaqueOp(source, "keyword arguments in perform")
+    for arg in args:
+        reason = _check_expr(arg)
+        if reason:
+            return OpaqueOp(source, reason)
+    arg_sources = tuple(ast.unparse(a) for a in args)
+    if render_effect(effect, operation, arg_sources) is None:
+        return OpaqueOp(source, f"no effect binding for {effect}.{operation}/{len(args)}")
+    return PerformOp(effect, operation, arg_sources, target, returns)
+
+def _lower_statement(stmt: ast.stmt, source: str):
+    if isinstance(stmt, ast.Expr) and _perform_call(stmt.value):
+        return _lower_perform(stmt.value, source)
+    if isinstance(stmt, ast.Return):
+        if stmt.value is not None and _perform_call(stmt.value):
+            return _lower_perform(stmt.value, source, returns=True)
+        if stmt.value is None:
+            return ReturnOp("None")
+        reason = _check_expr(stmt.value)
+        return OpaqueOp(source, reason) if reason else ReturnOp(ast.unparse(stmt.value))
+    if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Name):
+        target = stmt.targets[0].id
+        if _perform_call(stmt.value):
+            return _lower_perform(stmt.value, source, target=target)
+        reason = _check_expr(stmt.value)
+        return OpaqueOp(source, reason) if reason else AssignOp(target, ast.unparse(stmt.value))
+    return OpaqueOp(source, f"unsupported statement ({type(stmt).__name__})")
+
+_MARKER_CALL = re.compile(_PERFORM_MARKER + r'\("(\w+)", "(\w+)", ')
+
+def _normalize(body: str) -> str:
+    # Bodies arrive with the first line stripped but later lines still indented
+    lines = body.strip("\n").splitlines()
+    if not lines:
+        return ""
+    return (lines[0].strip() + "\n" + textwrap.dedent("\n".join(lines[1:]))).strip()
+
+def parse_body(body: str) -> Tuple[Any, ...]:
+    """Lowers a step or function body into IR ops. Never raises: unknown forms become OpaqueOp."""
+    body = _normalize(body)
+    rewritten = _PERFORM_CALL.sub(lambda m: f'{_PERFORM_MARKER}("{m.group(1)}", "{m.group(2)}", ', body)
+    try:
+        tree = ast.parse(rewritten)
+    except SyntaxError as e:
+        return (OpaqueOp(body, f"syntax error: {e.msg}"),)
+    ops = []
+    for stmt in tree.body:
+        segment = ast.get_source_segment(rewritten, stmt) or ast.unparse(stmt)
+        source = _MARKER_CALL.sub(lambda m: f"perform {m.group(1)}.{m.group(2)}(", segment)
+        ops.append(_lower_statement(stmt, source))
+    return tuple(ops)
+
+def parse_step(name: str, body: str) -> StepIR:
+    return StepIR(name, parse_body(body))
+
+# --- Code Generation ---
+
+def _compile_expr(expr: str):
+    return compile(expr, "<workflow>", "eval")
+
+_EVAL_GLOBALS = dict(EFFECT_NAMESPACE, __builtins__={"str": str})
+
+def compile_ops(ops, name: str, param_names: Tuple[str, ...]) -> Callable[..., Generator]:
+    """
+    Compiles IR ops into a generator function. Each effect is yielded to the caller
+    (e.g. Runtime.step / Runtime.run), which sends the handler's result back in.
+    """
+    opaque = [op for op in ops if isinstance(op, OpaqueOp)]
+    if opaque:
+        raise WorkflowCompileError(f"'{name}' needs synthesis: {opaque[0].reason} in `{opaque[0].source}`")
+
+    plan = []
+    for op in ops:
+        if isinstance(op, PerformOp):
+            plan.append((op, _compile_expr(render_effect(op.effect, op.operation, op.args))))
+        else:
+            plan.append((op, _compile_expr(op.expr)))
+
+    def run(*args, **kwargs):
+        env = dict(zip(param_names, args))
+        env.update(kwargs)
+        result = None
+        for op, code in plan:
+            if isinstance(op, PerformOp):
+                result = yield eval(code, _EVAL_GLOBALS, env)
+                if op.target:
+                    env[op.target] = result
+                if op.returns:
+                    return result
+            elif isinstance(op, AssignOp):
+                env[op.target] = eval(code, _EVAL_GLOBALS, env)
+            else:
+                return eval(code, _EVAL_GLOBALS, env)
+        return result
+
+    run.__name__ = name
+    return run
+
+def compile_workflow(workflow) -> Callable[..., Generator]:
+    """Compiles a WorkflowSpec (all of its steps, in order) into a generator function."""
+    ops = [op for step in workflow.ir for op in step.ops]
+    return compile_ops(ops, workflow.name, tuple(p.name for p in workflow.params))
+
+class WorkflowAgent(Agent):
+    """Adapts a compiled workflow to the Agent interface driven by Runtime."""
+    def __init__(self, workflow, *args, **kwargs):
+        super().__init__(AgentSpec(name=workflow.name, description=f"Compiled workflow {workflow.name}"), State())
+        self._run = compile_workflow(workflow)
+        self._args = args
+        self._kwargs = kwargs
+        self.policy_generator = self.policy()
+
+    def policy(self) -> Generator:
+        return self._run(*self._args, **self._kwargs)
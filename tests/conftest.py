@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Kernel unit tests import the repo's packages (kernel, benchmarks) from the root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,36 @@
+import os
+from kernel.cache import DiskCache, LLMCache
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=250)
+    for key in ("a", "b", "c"):
+        cache.put_bytes(key, b"x" * 100)
+        os.utime(tmp_path / key, (ord(key), ord(key)))
+    assert sorted(os.listdir(tmp_path)) == ["b", "c"]
+    assert cache.get_bytes("a") is None
+    assert cache.get_bytes("c") == b"x" * 100
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_llm_keys_cover_every_request_field(tmp_path):
+    cache = LLMCache(str(tmp_path))
+    key = cache.key_for("m", 0.1, "sys", "prompt")
+    assert key == cache.key_for("m", 0.1, "sys", "prompt")
+    assert key != cache.key_for("m", 0.3, "sys", "prompt")
+    assert key != cache.key_for("m", 0.1, "sys", "prompt", response_format={"type": "json_object"})
+    assert key != cache.key_for("m", 0.1, "sys", "prompt", sample=1)
+    cache.put(key, "response")
+    assert cache.get(key) == "response"
+
+def test_cache_hit_never_imports_the_parser(tmp_path):
+    import subprocess, sys
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = (
+        "import sys\n"
+        "from kernel.cache import SpecCache\n"
+        "from kernel.compiler import Compiler\n"
+        f"Compiler(cache=SpecCache({str(tmp_path)!r})).compile_file({os.path.join(root, 'specs', 'SPEC.level4.md')!r})\n"
+        "print(sorted(m for m in sys.modules if m.split('.')[-1] in ('spec_parser', '_aispec_parser', 'lark')))\n"
+    )
+    run = lambda: subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True, check=True).stdout
+    assert run().strip() != "[]" # Miss: parsed
+    assert run().strip() == "[]" # Hit: served from the cache
@@ -0,0 +1,76 @@
+import os
+from kernel.compiler import Compiler
+from kernel.builder import Builder
+from kernel.codegen import GeneratedComponent, _generate_method, generate_component
+from kernel.workflow_ir import parse_body
+from kernel.verifier import run_shard
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _component(spec_file, name):
+    spec = Compiler().compile_file(os.path.join(ROOT, "specs", spec_file))
+    return next(c for c in spec.components if c.name == name)
+
+def test_body_ignoring_a_parameter_is_left_to_the_llm():
+    # calculate(a, b, op) is specified with the illustrative body `perform Math.add(a, b)`
+    gen = generate_component(_component("SPEC.level2.md", "Solver"))
+    assert not gen.complete
+    assert "calculate" not in gen.methods
+    assert gen.missing == ["calculate(a: Float, b: Float, op: String) -> Float"]
+    assert "Math" not in gen.effect_names
+
+def test_body_using_every_parameter_is_generated():
+    gen = generate_component(_component("SPEC.level4.md", "Worker"))
+    assert gen.complete
+    assert "return 'Completed task: ' + task" in gen.methods["do_work"]
+
+def test_workflow_only_component_is_not_complete():
+    gen = generate_component(_component("SPEC.level4.md", "Manager"))
+    assert not gen.complete
+    assert gen.missing == []
+    assert "execute_project" in gen.methods
+
+SOLVER_SPEC = '''system Arithmetic {
+    effect Math {
+        operation add(a: Float, b: Float) -> Float;
+    }
+    component Solver {
+        function calculate(a: Float, b: Float, op: String) -> Float {
+            perform Math.add(a, b)
+        }
+    }
+}
+'''
+
+SOLVER_VECTORS = """component: Solver
+tests:
+  - {name: add, function: calculate, input: {a: 5, b: 3, op: add}, expected: 8.0}
+  - {name: mul, function: calculate, input: {a: 4, b: 6, op: mul}, expected: 24.0}
+"""
+
+def _run_vectors(tmp_path, source):
+    (tmp_path / "solver.py").write_text(source, encoding="utf-8")
+    (tmp_path / "tests.solver.yaml").write_text(SOLVER_VECTORS, encoding="utf-8")
+    file_error, results = run_shard(str(tmp_path / "tests.solver.yaml"), str(tmp_path))
+    assert file_error is None
+    return [r.name for r in results if r.error]
+
+def test_codegen_output_failing_its_vectors_goes_to_the_llm(tmp_path, monkeypatch):
+    solver = Compiler().compile(SOLVER_SPEC).components[0]
+    # The illustrative body, generated as written, fails the vectors...
+    literal = GeneratedComponent("Solver")
+    func = solver.functions[0]
+    assert _generate_method(func.name, func.params, func.return_type, parse_body(func.body), literal)
+    literal.functions_generated = 1
+    assert _run_vectors(tmp_path, literal.source()) == ["mul"]
+
+    # ...so the builder must ask the LLM instead of shipping it
+    prompts = []
+    implementation = ("```python\nclass Solver:\n    def calculate(self, a: float, b: float, op: str) -> float:\n"
+                      "        return {'add': a + b, 'mul': a * b}[op]\n```")
+    builder = Builder(model_name="test/model", cache=None)
+    monkeypatch.setattr(builder, "_record", lambda entry: None)
+    monkeypatch.setattr(builder, "_complete", lambda system, prompt, **kwargs: prompts.append(prompt) or implementation)
+    code = builder.implement_component(solver)
+    assert len(prompts) == 1 and "calculate(a: Float, b: Float, op: String)" in prompts[0]
+    assert _run_vectors(tmp_path, code) == []
@@ -0,0 +1,26 @@
+import os
+from kernel.history import HistoryLog, prune_sessions
+
+def test_entries_read_back_from_disk_past_the_ring_buffer(tmp_path):
+    log = HistoryLog(str(tmp_path / "s.jsonl.gz"), ring_size=2)
+    for i in range(5):
+        log.append({"i": i})
+    assert [e["i"] for e in log.last(4)] == [1, 2, 3, 4]
+    assert log.entry(0) == {"i": 0}
+    assert len(HistoryLog(log.path)) == 5
+
+def test_old_sessions_are_pruned(tmp_path):
+    for i in range(5):
+        log = HistoryLog(str(tmp_path / f"{i}.jsonl.gz"))
+        log.append({"i": i})
+        os.utime(log.path, (i, i))
+    assert prune_sessions(str(tmp_path), keep=2) == 3
+    assert sorted(os.listdir(tmp_path)) == ["3.idx", "3.jsonl.gz", "4.idx", "4.jsonl.gz"]
+
+def test_sessions_are_pruned_to_the_byte_cap(tmp_path):
+    for i in range(3):
+        log = HistoryLog(str(tmp_path / f"{i}.jsonl.gz"))
+        log.append({"data": os.urandom(2000).hex()})
+        os.utime(log.path, (i, i))
+    assert prune_sessions(str(tmp_path), keep=10, max_bytes=3000) == 2
+    assert os.path.exists(tmp_path / "2.jsonl.gz")
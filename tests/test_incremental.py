@@ -0,0 +1,62 @@
+from kernel.compiler import Compiler
+from kernel.spec_repl import SpecREPL
+
+SPEC = '''system Shop {
+    component Cart {
+        function add(item: String) -> Unit;
+    }
+    component Billing {
+        function total(items: List<String>) -> Float;
+    }
+}
+'''
+
+def _write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+def test_compile_incremental_reports_only_changed_components(tmp_path):
+    compiler = Compiler()
+    path = _write(tmp_path / "SPEC.shop.md", SPEC)
+    previous, diff = compiler.compile_incremental(path)
+    assert diff.affected_components() == {"Cart", "Billing"}
+
+    _write(tmp_path / "SPEC.shop.md", SPEC.replace("total(items: List<String>)", "total(items: List<String>, tax: Float)"))
+    spec, diff = compiler.compile_incremental(path, previous)
+    assert diff.functions.modified == ["Billing.total"]
+    assert diff.affected_components() == {"Billing"}
+
+class _RecordingVerifier:
+    def __init__(self):
+        self.calls = []
+        self.dynamic = type("Dynamic", (), {"cassette": None, "force": False})()
+        self.static = type("Static", (), {"missing_components": [], "verify": lambda self, spec, src_dir: True})()
+
+    def verify_spec(self, spec, src_dir, jobs, components=None):
+        self.calls.append(components)
+        return True
+
+def test_build_and_verify_after_reload_cover_only_affected_components(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = _write(tmp_path / "SPEC.shop.md", SPEC)
+    repl = SpecREPL()
+    repl.compiler.cache = None
+    repl.do_load(path)
+    _write(tmp_path / "SPEC.shop.md", SPEC.replace("add(item: String)", "add(item: String, count: Int)"))
+    repl.do_reload("")
+
+    repl._verifier = _RecordingVerifier()
+    repl.do_verify("")
+    repl.do_verify("--all")
+    assert repl._verifier.calls == [{"Cart"}, None]
+
+    built = []
+    monkeypatch.setattr(repl, "_build_component", lambda comp, implement, *args, **kwargs: built.append((comp.name, implement)))
+    monkeypatch.setattr(repl, "_generate_tests_batch", lambda components, test_dir, stale=(): set())
+    monkeypatch.setattr(repl, "_print_llm_stats", lambda: None)
+    repl._build("")
+    assert built == [("Cart", True)]
+
+    repl.do_load(path)
+    repl.do_verify("")
+    assert repl._verifier.calls[-1] is None
@@ -0,0 +1,77 @@
+import pytest
+from kernel.patching import PatchError, apply_patch, parse_patch
+
+SOURCE = """class Calculator:
+    def add(self, a, b):
+        return a - b
+
+    def sub(self, a, b):
+        return a - b
+"""
+
+def _block(search, replace):
+    return f"<<<<<<< SEARCH\n{search}=======\n{replace}>>>>>>> REPLACE\n"
+
+def test_search_replace_applies_a_unique_match():
+    response = _block("    def add(self, a, b):\n        return a - b\n", "    def add(self, a, b):\n        return a + b\n")
+    patched = apply_patch(SOURCE, "Here is the fix:\n" + response, "python")
+    assert "return a + b" in patched
+    assert patched.count("return a - b") == 1
+
+def test_search_replace_tolerates_trailing_whitespace():
+    response = _block("    def add(self, a, b):   \n        return a - b\n", "    def add(self, a, b):\n        return a + b\n")
+    assert "return a + b" in apply_patch(SOURCE, response, "python")
+
+def test_ambiguous_search_is_rejected():
+    response = _block("        return a - b\n", "        return a + b\n")
+    with pytest.raises(PatchError, match="matches 2 times"):
+        apply_patch(SOURCE, response, "python")
+
+def test_missing_search_is_rejected():
+    response = _block("    def mul(self, a, b):\n", "    def mul(self, a, b, c):\n")
+    with pytest.raises(PatchError, match="not found"):
+        apply_patch(SOURCE, response, "python")
+
+def test_result_that_does_not_parse_is_rejected():
+    response = _block("    def add(self, a, b):\n        return a - b\n", "    def add(self, a, b):\n        return (a + b\n")
+    with pytest.raises(PatchError, match="does not parse"):
+        apply_patch(SOURCE, response, "python")
+
+def test_response_without_edits_is_rejected():
+    with pytest.raises(PatchError, match="no SEARCH/REPLACE"):
+        parse_patch("The bug is in add(): it subtracts.")
+
+def test_unified_diff_applies_ignoring_hunk_line_numbers():
+    diff = """--- a/calculator.py
++++ b/calculator.py
+@@ -40,3 +40,3 @@
+     def add(self, a, b):
+-        return a - b
++        return a + b
+ 
+"""
+    patched = apply_patch(SOURCE, diff, "python")
+    assert "return a + b" in patched
+    assert patched.count("return a - b") == 1
+
+def test_unified_diff_with_ambiguous_context_is_rejected():
+    diff = """@@ -1,1 +1,1 @@
+-        return a - b
++        return a + b
+"""
+    with pytest.raises(PatchError):
+        apply_patch(SOURCE, diff, "python")
+
+def test_unified_diff_with_missing_context_is_rejected():
+    diff = """@@ -1,2 +1,2 @@
+     def mul(self, a, b):
+-        return a * b
++        return b * a
+"""
+    with pytest.raises(PatchError, match="not found"):
+        apply_patch(SOURCE, diff, "python")
+
+def test_yaml_patch_is_validated():
+    source = "tests:\n  - name: t\n    expected: 1\n"
+    with pytest.raises(PatchError, match="YAML does not parse"):
+        apply_patch(source, _block("    expected: 1\n", "    expected: [1\n"), "yaml")
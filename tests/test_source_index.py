@@ -0,0 +1,40 @@
+import os
+from kernel.source_index import SourceIndex
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def test_reparses_only_changed_files(tmp_path):
+    src = str(tmp_path)
+    _write(os.path.join(src, "calculator.py"), "class Calculator:\n    def add(self): pass\n")
+    _write(os.path.join(src, "solver.py"), "class Solver:\n    pass\n")
+    index = SourceIndex(src).refresh()
+    assert index.parsed == 2
+    assert index.refresh().parsed == 0
+    _write(os.path.join(src, "solver.py"), "class Solver:\n    def calculate(self): pass\n")
+    assert index.refresh().parsed == 1
+    assert next(index.with_prefix("solver")).classes == {"Solver": {"calculate"}}
+
+def test_prefix_lookup_puts_the_exact_module_first(tmp_path):
+    src = str(tmp_path)
+    for name in ("comp10.py", "comp1.py", "comp2.py"):
+        _write(os.path.join(src, name), "")
+    names = [os.path.basename(f.path) for f in SourceIndex(src).refresh().with_prefix("comp1")]
+    assert names == ["comp1.py", "comp10.py"]
+
+def test_digest_follows_transitive_src_imports(tmp_path):
+    src = str(tmp_path)
+    _write(os.path.join(src, "top.py"), "from pkg import a\n")
+    _write(os.path.join(src, "pkg", "a.py"), "from .helper import x\n")
+    _write(os.path.join(src, "pkg", "helper.py"), "x = 1\n")
+    _write(os.path.join(src, "other.py"), "y = 1\n")
+    index = SourceIndex(src).refresh()
+    assert [os.path.relpath(f.path, src) for f in index.dependencies(os.path.join(src, "top.py"))] == \
+        ["pkg/a.py", "pkg/helper.py", "top.py"]
+    before = index.digest(os.path.join(src, "top.py"))
+    _write(os.path.join(src, "other.py"), "y = 2\n")
+    assert index.refresh().digest(os.path.join(src, "top.py")) == before
+    _write(os.path.join(src, "pkg", "helper.py"), "x = 22\n")
+    assert index.refresh().digest(os.path.join(src, "top.py")) != before
@@ -0,0 +1,31 @@
+import threading
+from concurrent.futures import Future
+from kernel.compiler import ComponentSpec, FunctionSpec, field_ref, type_ref
+from kernel.speculative import MAX_TEMPERATURE, synthesize
+
+class _FailingPool:
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(["wrong"])
+        return future
+
+class _Builder:
+    model_name = "test/model"
+    temperature = 0.2
+
+    def __init__(self):
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def implement_component(self, spec, context_info, temperature, cancel, sample):
+        with self._lock:
+            self.requests.append((temperature, sample))
+        return "class Adder:\n    pass\n"
+
+def test_candidates_at_the_capped_temperature_are_distinct_samples():
+    spec = ComponentSpec("Adder", functions=[FunctionSpec("add", (field_ref("a", type_ref("Int")),), type_ref("Int"))])
+    builder = _Builder()
+    result = synthesize(builder, spec, "", "tests.adder.yaml", 10, _FailingPool())
+    assert len(result.candidates) == 10
+    assert len(set(builder.requests)) == 10
+    assert sorted(s for t, s in builder.requests if t == MAX_TEMPERATURE) == [0, 1, 2, 3] # Candidates 6-9
@@ -0,0 +1,26 @@
+from kernel.streaming import CodeStreamExtractor
+
+def _feed(extractor, text, size=7):
+    for i in range(0, len(text), size):
+        if extractor.feed(text[i:i + size]):
+            break
+    return extractor
+
+def test_stops_after_the_first_fence_closes():
+    extractor = _feed(CodeStreamExtractor(), "Sure:\n```python\nx = 1\n```\nThis sets x.\n" + "blah " * 100)
+    assert extractor.done and not extractor.aborted
+    assert extractor.code == "x = 1"
+    assert len(extractor.text) < 100
+
+def test_aborts_on_syntax_no_continuation_can_fix():
+    extractor = _feed(CodeStreamExtractor(), "```python\ndef f(:\n    return 1\n```\n")
+    assert extractor.aborted
+    assert extractor.error
+
+def test_incomplete_blocks_are_not_errors():
+    extractor = _feed(CodeStreamExtractor(), "```python\nclass A:\n    def f(self):\n        return (1 +\n                2)\n```")
+    assert extractor.done and not extractor.aborted
+
+def test_yaml_is_not_syntax_checked():
+    extractor = _feed(CodeStreamExtractor(language="yaml"), "```yaml\ntests: [\n```\n")
+    assert extractor.done and not extractor.aborted
@@ -0,0 +1,21 @@
+import threading
+from kernel import telemetry
+
+def test_slow_tokenizer_load_does_not_block_other_models(monkeypatch):
+    release = threading.Event()
+    def load(model):
+        if model == "slow":
+            release.wait(2)
+        return lambda text: len(text.split())
+    monkeypatch.setattr(telemetry, "_load_counter", load)
+    monkeypatch.setattr(telemetry, "_counters", {})
+
+    slow = threading.Thread(target=telemetry.count_tokens, args=("a b", "slow"))
+    slow.start()
+    try:
+        assert telemetry.count_tokens("one two three", "fast") == 3
+        assert slow.is_alive() # Counted while the slow load was still running
+    finally:
+        release.set()
+        slow.join()
+    assert telemetry.count_tokens("a b", "slow") == 2
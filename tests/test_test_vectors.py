@@ -0,0 +1,60 @@
+import yaml
+from kernel.builder import Builder
+from kernel.compiler import ComponentSpec, FunctionSpec, field_ref, type_ref
+from kernel.test_vectors import to_yaml, validate_tests, validate_vectors
+
+def _spec():
+    add = FunctionSpec("add", (field_ref("a", type_ref("Int")), field_ref("b", type_ref("Int"))), type_ref("Int"))
+    return ComponentSpec("Adder", functions=[add])
+
+def test_vectors_are_checked_against_signatures():
+    valid, problems = validate_vectors([
+        {"name": "ok", "function": "add", "input": {"a": 1, "b": 2}, "expected": 3},
+        {"name": "bad_args", "function": "add", "input": {"x": 1}, "expected": 1},
+        {"name": "bad_type", "function": "add", "input": {"a": "1", "b": 2}, "expected": 3},
+        {"name": "ok", "function": "add", "input": {"a": 0, "b": 0}, "expected": 0},
+        {"name": "unknown", "function": "sub", "input": {}, "expected": 0},
+    ], _spec())
+    assert [t["name"] for t in valid] == ["ok"]
+    assert len(problems) == 4
+
+def test_validate_tests_round_trips_to_yaml():
+    tests = [{"name": "ok", "function": "add", "input": {"a": 1, "b": 2}, "expected": 3}]
+    assert validate_tests(yaml.safe_load(to_yaml("Sys", _spec(), tests)), _spec()) is None
+
+def _builder(monkeypatch, responses):
+    builder = Builder(model_name="test/model", cache=None)
+    monkeypatch.setattr(builder, "_record", lambda entry: None)
+    monkeypatch.setattr(builder, "_complete", lambda *args, **kwargs: responses.pop(0))
+    return builder
+
+def test_fix_tests_rejects_vectors_that_do_not_fit_the_spec(monkeypatch):
+    bad = "```yaml\ncomponent: Adder\ntests:\n  - {name: t, function: add, input: {x: 1}, expected: 1}\n```"
+    builder = _builder(monkeypatch, [bad, bad])
+    assert builder.fix_tests("original", "error", full=True, spec=_spec()) == "original"
+
+def test_fix_tests_retries_after_a_rejected_answer(monkeypatch):
+    bad = "```yaml\ncomponent: Adder\ntests: not a list\n```"
+    good = "```yaml\ncomponent: Adder\ntests:\n  - {name: t, function: add, input: {a: 1, b: 1}, expected: 2}\n```"
+    builder = _builder(monkeypatch, [bad, good])
+    fixed = builder.fix_tests("original", "error", full=True, spec=_spec())
+    assert yaml.safe_load(fixed)["tests"][0]["name"] == "t"
+
+def test_build_implements_a_component_whose_test_generation_failed(tmp_path):
+    from kernel.compiler import SystemSpec
+    from kernel.spec_repl import SpecREPL
+    class FailingTests:
+        def generate_tests(self, comp, system_name):
+            return "# Error generating tests: no valid vectors"
+        def implement_component(self, comp, test_context):
+            assert test_context == ""
+            return "class Adder:\n    pass\n"
+    repl = SpecREPL()
+    repl._builder = FailingTests()
+    repl.current_spec = SystemSpec("AdderSystem", components=[_spec()])
+    (tmp_path / "src").mkdir()
+    (tmp_path / "tests").mkdir()
+    error = repl._build_component(_spec(), True, str(tmp_path / "src"), str(tmp_path / "tests"), best_of=3, verify_pool=object())
+    assert error is None
+    assert (tmp_path / "src" / "adder.py").exists()
+    assert not (tmp_path / "tests" / "tests.adder.yaml").exists()
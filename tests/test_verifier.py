@@ -0,0 +1,51 @@
+import os
+from kernel.verifier import DynamicVerifier, plan_shards
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _vectors(name):
+    return os.path.join(ROOT, "tests", f"tests.{name}.yaml")
+
+def test_files_are_not_split_unless_marked_parallel():
+    assert plan_shards([_vectors("manager")], 4) == [(_vectors("manager"), None)]
+
+def test_parallel_files_are_split_into_contiguous_chunks():
+    shards = plan_shards([_vectors("calculator")], 4)
+    assert len(shards) > 1
+    assert sum((indices for _, indices in shards), []) == list(range(4))
+
+def test_stateful_file_passes_with_many_workers():
+    verifier = DynamicVerifier()
+    try:
+        errors = verifier.run_many([_vectors("manager"), _vectors("calculator")], os.path.join(ROOT, "src"), jobs=4)
+    finally:
+        verifier.close()
+    assert errors == {_vectors("manager"): [], _vectors("calculator"): []}
+
+def test_record_mode_runs_tests_the_result_cache_already_passed(tmp_path):
+    from kernel.cache import ResultCache
+    verifier = DynamicVerifier(ResultCache(str(tmp_path / "results")))
+    verifier.run_tests(_vectors("calculator"), os.path.join(ROOT, "src"))
+    verifier.run_tests(_vectors("calculator"), os.path.join(ROOT, "src"))
+    assert verifier.skipped == 4
+    entries = verifier.cache.stats()["entries"]
+    verifier.cassette = "record"
+    verifier.reset_savings()
+    verifier.run_tests(_vectors("calculator"), os.path.join(ROOT, "src"))
+    assert verifier.skipped == 0
+    assert verifier.cache.stats()["entries"] == entries # Record-mode results are never looked up
+
+def test_changed_import_reloads_a_cached_component(tmp_path, monkeypatch):
+    from kernel.cache import ResultCache
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "probe_helper.py").write_text("VALUE = 1\n")
+    (src / "probe.py").write_text("from probe_helper import VALUE\n\nclass Probe:\n    def get(self):\n        return VALUE\n")
+    vectors = tmp_path / "tests.probe.yaml"
+    vectors.write_text("component: Probe\ntests:\n  - {name: value, function: get, input: {}, expected: 1}\n")
+    monkeypatch.syspath_prepend(str(src))
+    verifier = DynamicVerifier(ResultCache(str(tmp_path / "results")))
+    assert verifier.run_tests(str(vectors), str(src)) == []
+
+    (src / "probe_helper.py").write_text("VALUE = 2\n")
+    assert verifier.run_tests(str(vectors), str(src)) != []
@@ -0,0 +1,24 @@
+import pickle
+from kernel import effect_bindings
+from kernel.compiler import Compiler
+
+SPEC = '''system Desk {
+    component Clerk {
+        workflow File(doc: String) {
+            step Store {
+                perform Archive.put(doc)
+            }
+        }
+    }
+}
+'''
+
+def test_cached_workflows_are_lowered_with_the_current_bindings(monkeypatch):
+    workflow = Compiler().compile(SPEC).components[0].workflows[0]
+    assert not workflow.compilable # Archive.put has no binding yet
+    cached = pickle.dumps(workflow)
+
+    monkeypatch.setitem(effect_bindings.BINDINGS, ("Archive", "put"), "WriteFile(FileWrite(path='archive', content={0}))")
+    restored = pickle.loads(cached)
+    assert restored == workflow
+    assert restored.compilable